@@ -0,0 +1,120 @@
+"""Incrementally maintained sales rollups.
+
+Every sale and cancellation updates running totals per drink, per hour and
+per day in O(1), so reports are read straight from the aggregates instead of
+rescanning transaction history. Change left after a sale stays in the
+machine as credit, so it is counted as paid out only when it is returned.
+"""
+import time
+
+
+class SalesAnalytics:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Start all totals again from zero."""
+        self.units_by_drink = {}
+        self.revenue_by_drink = {}
+        self.units_by_hour = {}
+        self.revenue_by_hour = {}
+        self.units_by_day = {}
+        self.revenue_by_day = {}
+        self.units = 0
+        self.revenue = 0
+        self.sales = 0
+        self.change_paid = 0
+        self.change_collections = 0
+        self.cancellations = 0
+        self.refunded = 0
+
+    def record_sale(self, drinks, price, timestamp=None):
+        """Record one purchase of one or more drinks at a unit price."""
+        local = time.localtime(timestamp)
+        hour = time.strftime("%Y-%m-%d %H:00", local)
+        day = hour[:10]
+        total = len(drinks) * price
+
+        for drink in drinks:
+            self.units_by_drink[drink] = self.units_by_drink.get(drink, 0) + 1
+            self.revenue_by_drink[drink] = self.revenue_by_drink.get(drink, 0) + price
+
+        self.units_by_hour[hour] = self.units_by_hour.get(hour, 0) + len(drinks)
+        self.revenue_by_hour[hour] = self.revenue_by_hour.get(hour, 0) + total
+        self.units_by_day[day] = self.units_by_day.get(day, 0) + len(drinks)
+        self.revenue_by_day[day] = self.revenue_by_day.get(day, 0) + total
+
+        self.units += len(drinks)
+        self.revenue += total
+        self.sales += 1
+
+    def record_cancel(self, refund, change=0, abandoned=False):
+        """Record credit returned; change is the part of refund left over from sales.
+
+        Collecting change is not a cancellation. Only returning unspent
+        credit, or dropping a selection, counts as one.
+        """
+        if change:
+            self.change_paid += change
+            self.change_collections += 1
+        unspent = refund - change
+        if unspent or abandoned:
+            self.cancellations += 1
+            self.refunded += unspent
+
+    def summary(self):
+        return {
+            "units": self.units,
+            "revenue": self.revenue,
+            "sales": self.sales,
+            "average_sale": round(self.revenue / self.sales, 1) if self.sales else 0,
+            "change_paid": self.change_paid,
+            "change_collections": self.change_collections,
+            "cancellations": self.cancellations,
+            "refunded": self.refunded,
+        }
+
+    def top_drinks(self, n=None):
+        """(drink, units, revenue) sorted by units sold, best first."""
+        rows = [(drink, units, self.revenue_by_drink[drink])
+                for drink, units in self.units_by_drink.items()]
+        rows.sort(key=lambda row: -row[1])
+        return rows[:n] if n else rows
+
+    def by_hour(self, last=None):
+        """(hour, units, revenue) in time order, optionally only the latest ones."""
+        rows = [(hour, units, self.revenue_by_hour[hour])
+                for hour, units in sorted(self.units_by_hour.items())]
+        return rows[-last:] if last else rows
+
+    def by_day(self, last=None):
+        rows = [(day, units, self.revenue_by_day[day])
+                for day, units in sorted(self.units_by_day.items())]
+        return rows[-last:] if last else rows
+
+    def format_report(self, last_hours=6):
+        s = self.summary()
+        lines = [
+            f"Drinks sold: {s['units']} in {s['sales']} sales",
+            f"Revenue: {s['revenue']} KShs (average sale {s['average_sale']} KShs)",
+            f"Change paid out: {s['change_paid']} KShs ({s['change_collections']} collections)",
+            f"Cancellations: {s['cancellations']} (refunded {s['refunded']} KShs)",
+            "",
+            "By drink:",
+        ]
+        lines += [f"  {drink:<14} {units:>5} units {revenue:>8} KShs"
+                  for drink, units, revenue in self.top_drinks()]
+        lines += ["", "By day:"]
+        lines += [f"  {day}  {units:>5} units {revenue:>8} KShs"
+                  for day, units, revenue in self.by_day()]
+        lines += ["", f"Last {last_hours} hours with sales:"]
+        lines += [f"  {hour}  {units:>5} units {revenue:>8} KShs"
+                  for hour, units, revenue in self.by_hour(last_hours)]
+        return "\n".join(lines)
+
+    def snapshot(self):
+        return dict(vars(self))
+
+    def restore(self, snapshot):
+        for key, value in snapshot.items():
+            setattr(self, key, dict(value) if isinstance(value, dict) else value)
@@ -0,0 +1,53 @@
+"""Single frame-clock scheduler for canvas animations.
+
+Instead of every animation scheduling its own root.after() per frame, all
+active animations are advanced together from one fixed-rate timer. An
+animation is any iterator: each tick calls next() on it once, and it is
+finished when it is exhausted. The timer only runs while something is active.
+"""
+
+FRAME_INTERVAL_MS = 100
+
+
+class FrameClock:
+    def __init__(self, root, interval=FRAME_INTERVAL_MS):
+        self.root = root
+        self.interval = interval
+        self.animations = []
+        self.timer = None
+
+    def add(self, frames, on_done=None):
+        """Start an animation; on_done() is called after its last frame."""
+        self.animations.append((iter(frames), on_done))
+        if self.timer is None:
+            self.timer = self.root.after(self.interval, self.tick)
+
+    def tick(self):
+        """Advance every active animation by one frame."""
+        self.timer = None
+        finished = []
+        still_running = []
+        for animation in self.animations:
+            try:
+                next(animation[0])
+                still_running.append(animation)
+            except StopIteration:
+                finished.append(animation)
+        self.animations = still_running
+
+        if self.animations:
+            self.timer = self.root.after(self.interval, self.tick)
+
+        for _, on_done in finished:
+            if on_done is not None:
+                on_done()
+
+    def is_idle(self):
+        return not self.animations
+
+    def stop(self):
+        """Drop all animations without calling their completion callbacks."""
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+            self.timer = None
+        self.animations = []
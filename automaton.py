@@ -0,0 +1,336 @@
+"""General finite automata: NFAs with epsilon-moves and subset construction.
+
+NFA states are integer ids and a set of states is an integer bitmask, so
+epsilon-closure and move are OR-ing precomputed masks bit by bit.
+determinize() interns every reachable subset mask in a dict and fills a flat
+transition table; the empty subset becomes the dead state.
+
+vending_nfa() builds a multi-product vending machine as an NFA: from each
+credit hub, epsilon-moves enter one branch per product, and a branch accepts
+once the credit covers that product's price. AutomatonMachine runs any such
+automaton behind the same commands as dfa.VendingMachineSimulation, so
+dfa.handle_command and dfa.run_simulation can drive it.
+
+    python automaton.py
+"""
+from array import array
+from functools import reduce
+from math import gcd
+
+from history import TransactionHistory, DEFAULT_CAPACITY, INSERT, DISPENSE, CANCEL
+
+EPSILON = None
+DEAD = -1
+
+
+def bits(mask):
+    """Indices of the set bits of mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class NFA:
+    def __init__(self, alphabet=()):
+        self.alphabet = list(alphabet)
+        self.names = []
+        self.labels = []
+        self.moves = []      # per state: symbol -> target mask
+        self.epsilon = []    # per state: epsilon target mask
+        self.accepting = 0
+        self.start = 0
+        self.closures = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def add_state(self, name=None, label=None, accepting=False):
+        state = len(self.names)
+        self.names.append(name if name is not None else f"s{state}")
+        self.labels.append(label)
+        self.moves.append({})
+        self.epsilon.append(0)
+        if accepting:
+            self.accepting |= 1 << state
+        return state
+
+    def add_move(self, source, symbol, target):
+        """Add a transition; symbol EPSILON (None) adds an epsilon-move."""
+        if symbol is EPSILON:
+            self.epsilon[source] |= 1 << target
+            self.closures = None
+        else:
+            moves = self.moves[source]
+            moves[symbol] = moves.get(symbol, 0) | 1 << target
+
+    def build_closures(self):
+        """Epsilon-closure of every single state, as masks."""
+        closures = []
+        for state in range(len(self)):
+            closure = frontier = 1 << state
+            while frontier:
+                reached = 0
+                for s in bits(frontier):
+                    reached |= self.epsilon[s]
+                frontier = reached & ~closure
+                closure |= frontier
+            closures.append(closure)
+        self.closures = closures
+
+    def closure(self, mask):
+        if self.closures is None:
+            self.build_closures()
+        closures = self.closures
+        result = 0
+        for s in bits(mask):
+            result |= closures[s]
+        return result
+
+    def start_set(self):
+        return self.closure(1 << self.start)
+
+    def step(self, mask, symbol):
+        """Subset reached from mask on symbol, epsilon-closed."""
+        moved = 0
+        moves = self.moves
+        for s in bits(mask):
+            moved |= moves[s].get(symbol, 0)
+        return self.closure(moved)
+
+    def run(self, inputs, mask=None):
+        if mask is None:
+            mask = self.start_set()
+        for symbol in inputs:
+            mask = self.step(mask, symbol)
+            if not mask:
+                break
+        return mask
+
+    def accepts(self, inputs):
+        return bool(self.run(inputs) & self.accepting)
+
+    def subset_labels(self, mask):
+        return [self.labels[s] for s in bits(mask)]
+
+    def determinize(self, limit=None):
+        """Subset construction over the reachable subsets; returns a DFA."""
+        alphabet = self.alphabet
+        start = self.start_set()
+        index = {start: 0}
+        subsets = [start]
+        table = array("i")
+
+        i = 0
+        while i < len(subsets):
+            mask = subsets[i]
+            for symbol in alphabet:
+                target = self.step(mask, symbol)
+                j = index.get(target)
+                if j is None:
+                    if limit is not None and len(subsets) >= limit:
+                        raise ValueError(f"More than {limit} DFA states")
+                    j = index[target] = len(subsets)
+                    subsets.append(target)
+                table.append(j)
+            i += 1
+        return DFA(self, subsets, index, table)
+
+
+class DFA:
+    """Deterministic automaton produced by NFA.determinize().
+
+    State ids index subsets; DEAD (-1) is returned for moves into the empty
+    subset.
+    """
+
+    def __init__(self, nfa, subsets, index, table):
+        self.nfa = nfa
+        self.alphabet = nfa.alphabet
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.alphabet)}
+        self.n_inputs = len(self.alphabet)
+        self.subsets = subsets
+        self.n_states = len(subsets)
+        self.start = 0
+
+        dead = index.get(0, DEAD)
+        self.next_state = array("i", (DEAD if j == dead else j for j in table))
+        self.accepting = bytearray(bool(mask & nfa.accepting) for mask in subsets)
+        self.label_cache = {}
+
+    def __len__(self):
+        return self.n_states
+
+    def step(self, state, symbol):
+        index = self.symbol_index.get(symbol)
+        if index is None or state == DEAD:
+            return DEAD
+        return self.next_state[state * self.n_inputs + index]
+
+    def run(self, inputs, state=None):
+        state = self.start if state is None else state
+        for symbol in inputs:
+            state = self.step(state, symbol)
+            if state == DEAD:
+                break
+        return state
+
+    def accepts(self, inputs):
+        state = self.run(inputs)
+        return state != DEAD and bool(self.accepting[state])
+
+    def labels(self, state):
+        labels = self.label_cache.get(state)
+        if labels is None:
+            labels = self.label_cache[state] = self.nfa.subset_labels(self.subsets[state])
+        return labels
+
+    def state_name(self, state):
+        if state == DEAD:
+            return "{}"
+        return "{" + ",".join(self.nfa.names[s] for s in bits(self.subsets[state])) + "}"
+
+
+def dispense_symbol(product, products):
+    return "dispense" if len(products) == 1 else f"dispense {product}"
+
+
+def vending_nfa(prices, denominations=(10, 20, 40, 50, 100, 200, 500, 1000), max_credit=2000):
+    """NFA for a machine selling several products, keeping change as credit.
+
+    prices maps product name to price. States are a hub per credit value plus
+    one branch state per (product, credit); the hub epsilon-moves into every
+    branch. Labels are (product or None, credit); branches are accepting
+    when they can pay for their product.
+
+    Determinized, each credit value appears about twice: once as a hub
+    subset (after start, dispense or cancel) and once as the subset of
+    branches reached by a coin, which has no hub in it. The two behave the
+    same but are distinct subsets, so the DFA has roughly two states per
+    credit value (about 400 for credit 0..2000 in steps of 10), whatever
+    the number of products.
+    """
+    products = list(prices)
+    alphabet = list(denominations) + [dispense_symbol(p, products) for p in products] + ["cancel"]
+    nfa = NFA(alphabet)
+
+    step = reduce(gcd, list(denominations) + list(prices.values()))
+    credits = range(0, max_credit + 1, step)
+    hub = {c: nfa.add_state(f"h{c}", (None, c)) for c in credits}
+    branch = {}
+    for product in products:
+        for c in credits:
+            state = nfa.add_state(f"{product}:{c}", (product, c), accepting=c >= prices[product])
+            branch[product, c] = state
+            nfa.add_move(hub[c], EPSILON, state)
+    nfa.start = hub[0]
+
+    for (product, c), state in branch.items():
+        for d in denominations:
+            if c + d in hub:
+                nfa.add_move(state, d, branch[product, c + d])
+        if c >= prices[product]:
+            nfa.add_move(state, dispense_symbol(product, products), hub[c - prices[product]])
+        if c:
+            nfa.add_move(state, "cancel", hub[0])
+    return nfa
+
+
+def credit_of(labels):
+    return labels[0][1] if labels else 0
+
+
+class AutomatonMachine:
+    """VendingMachineSimulation's commands on top of an automaton.
+
+    The automaton (a DFA, or anything with start, step(state, symbol) and
+    labels(state)) makes every decision: a move into the dead state is a
+    rejected input. Credit is read from the NFA labels of the current state.
+    """
+
+    def __init__(self, automaton, prices, history_capacity=DEFAULT_CAPACITY):
+        self.automaton = automaton
+        self.prices = dict(prices)
+        self.products = list(prices)
+        self.drink_price = min(self.prices.values())
+        self.valid_denominations = [s for s in automaton.alphabet if isinstance(s, int)]
+        self.transaction_history = TransactionHistory(history_capacity)
+        self.drinks_dispensed = 0
+        self.state = automaton.start
+
+    @property
+    def current_amount(self):
+        return credit_of(self.automaton.labels(self.state))
+
+    @property
+    def current_state(self):
+        return f"q{self.current_amount}"
+
+    def insert_money(self, denomination):
+        if denomination not in self.valid_denominations:
+            return f"Error: {denomination} is not a valid denomination."
+        target = self.automaton.step(self.state, denomination)
+        if target == DEAD:
+            return f"Error: credit limit reached. Current amount: {self.current_amount} KShs"
+
+        self.state = target
+        self.transaction_history.append(INSERT, denomination)
+        return f"Inserted {denomination} KShs. Current amount: {self.current_amount} KShs"
+
+    def dispense_drink(self, product=None):
+        product = product or self.products[0]
+        price = self.prices[product]
+        target = self.automaton.step(self.state, dispense_symbol(product, self.products))
+        if target == DEAD:
+            return f"Insufficient funds. Please insert at least {price - self.current_amount} more KShs"
+
+        self.state = target
+        self.drinks_dispensed += 1
+        change = self.current_amount
+        self.transaction_history.append(DISPENSE, price, change)
+        if change > 0:
+            return f"Drink dispensed! Your change is {change} KShs. New state: {self.current_state}"
+        return "Drink dispensed! No change. New state: q0"
+
+    def cancel_transaction(self):
+        refund = self.current_amount
+        target = self.automaton.step(self.state, "cancel")
+        if target == DEAD:
+            return "No money to return."
+
+        self.state = target
+        self.transaction_history.append(CANCEL, refund)
+        return f"Transaction cancelled. {refund} KShs returned. New state: q0"
+
+    def display_state(self):
+        return f"Current State: {self.current_state}\nAmount: {self.current_amount} KShs"
+
+    def display_history(self):
+        if not self.transaction_history:
+            return "No transactions yet."
+        history = "\n".join(f"{i+1}. {t}" for i, t in enumerate(self.transaction_history.recent(5)))
+        return f"Recent Transactions:\n{history}"
+
+    def draw_simple_diagram(self):
+        affordable = sorted({product for product, credit in self.automaton.labels(self.state)
+                             if product and credit >= self.prices[product]})
+        lines = [f"Automaton with {len(self.automaton)} states over {len(self.automaton.alphabet)} inputs"]
+        if hasattr(self.automaton, "state_name"):
+            name = self.automaton.state_name(self.state)
+            lines.append(f"Current subset: {name if len(name) < 120 else name[:117] + '...'}")
+        lines.append(f"Current state: {self.current_state}")
+        lines.append(f"Can dispense: {', '.join(affordable) if affordable else 'nothing'}")
+        if hasattr(self.automaton, "format_stats"):
+            lines.append(self.automaton.format_stats())
+        return "\n".join(lines)
+
+
+def build_machine(prices, **options):
+    """Determinize vending_nfa(prices) and wrap it in an AutomatonMachine."""
+    return AutomatonMachine(vending_nfa(prices, **options).determinize(), prices)
+
+
+if __name__ == "__main__":
+    from dfa import run_simulation
+
+    run_simulation(machine=build_machine({"soda": 50}))
@@ -0,0 +1,81 @@
+"""Vectorized lockstep simulation of many independent customer sessions.
+
+Requires NumPy. Sessions are rows of a 2-D array of alphabet indices (see
+CompiledMachine.encode); rows shorter than the widest one are padded with
+PAD, which leaves the session untouched.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from compiled import CompiledMachine, DEFAULT_MAX_CREDIT, compile_machine
+from dfa import CANCELLED
+
+PAD = -1
+
+SessionResults = namedtuple("SessionResults", "final_states drinks change refunded")
+
+
+class BatchSimulator:
+    def __init__(self, machine):
+        self.machine = machine
+        n_states, n_inputs = machine.n_states, machine.n_inputs
+
+        # 2-D views of the compiled tables, plus one extra no-op column for PAD
+        shape = (n_states, n_inputs)
+        next_state = np.frombuffer(machine.next_state, dtype=np.int32).reshape(shape)
+        dispensed = np.frombuffer(machine.dispensed, dtype=np.int8).reshape(shape)
+        status = np.frombuffer(machine.status, dtype=np.int8).reshape(shape)
+
+        self.pad_index = n_inputs
+        self.next_state = np.hstack([next_state, np.arange(n_states, dtype=np.int32)[:, None]])
+        self.dispensed = np.hstack([dispensed, np.zeros((n_states, 1), dtype=np.int8)])
+
+        # Refund paid by each cancel transition, in KShs
+        self.amounts = np.array([machine.amount(s) for s in range(n_states)], dtype=np.int64)
+        refund = np.where(status == CANCELLED, self.amounts[:, None], 0)
+        self.refund = np.hstack([refund, np.zeros((n_states, 1), dtype=np.int64)])
+
+    @classmethod
+    def for_machine(cls, denominations, drink_price, max_credit=DEFAULT_MAX_CREDIT):
+        return cls(CompiledMachine(denominations, drink_price, max_credit))
+
+    def encode(self, sessions):
+        """Encode ragged lists of raw inputs into a padded index matrix."""
+        width = max((len(s) for s in sessions), default=0)
+        matrix = np.full((len(sessions), width), PAD, dtype=np.int16)
+        for row, session in enumerate(sessions):
+            matrix[row, :len(session)] = self.machine.encode(session)
+        return matrix
+
+    def run(self, inputs, start_states=None):
+        """Advance every row in lockstep and return per-session results."""
+        inputs = np.asarray(inputs)
+        if inputs.ndim != 2:
+            raise ValueError("inputs must be a 2-D array with one row per session")
+        inputs = np.where(inputs == PAD, self.pad_index, inputs)
+
+        n_sessions = inputs.shape[0]
+        if start_states is None:
+            states = np.zeros(n_sessions, dtype=np.int32)
+        else:
+            states = np.array(start_states, dtype=np.int32)
+        drinks = np.zeros(n_sessions, dtype=np.int64)
+        refunded = np.zeros(n_sessions, dtype=np.int64)
+
+        for column in inputs.T:
+            drinks += self.dispensed[states, column]
+            refunded += self.refund[states, column]
+            states = self.next_state[states, column]
+
+        # Credit left in the machine at the end of the session is owed as change
+        change = self.amounts[states]
+        return SessionResults(states, drinks, change, refunded)
+
+
+def simulate_sessions(sessions, machine=None):
+    """Encode and run ragged sessions of raw inputs on a compiled machine."""
+    if machine is None:
+        machine = compile_machine()
+    simulator = BatchSimulator(machine)
+    return simulator.run(simulator.encode(sessions))
@@ -0,0 +1,208 @@
+"""Benchmark suite for the core VendingMachineSimulation methods.
+
+Each benchmark times individual calls with perf_counter_ns and reports
+throughput (ops/sec) and latency percentiles. Results can be saved as JSON
+and compared against a saved baseline to flag regressions:
+
+    python bench.py --output baseline.json
+    python bench.py --baseline baseline.json --threshold 0.10
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from dfa import VendingMachineSimulation
+
+DEFAULT_CALLS = 20000
+DEFAULT_THRESHOLD = 0.10
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def time_calls(call, inputs, prepare=None):
+    """Time call(x) for every x in inputs; prepare(x) runs untimed before each call."""
+    clock = time.perf_counter_ns
+    latencies = []
+    for x in inputs:
+        if prepare is not None:
+            prepare(x)
+        start = clock()
+        call(x)
+        latencies.append(clock() - start)
+    return latencies
+
+
+def summarize(latencies):
+    latencies.sort()
+    total = sum(latencies) or 1
+    return {
+        "calls": len(latencies),
+        "ops_per_sec": round(len(latencies) * 1e9 / total, 1),
+        "mean_ns": round(total / len(latencies), 1),
+        "p50_ns": percentile(latencies, 0.50),
+        "p90_ns": percentile(latencies, 0.90),
+        "p99_ns": percentile(latencies, 0.99),
+        "max_ns": latencies[-1],
+    }
+
+
+# Benchmarks: each takes (calls, rng) and returns a list of latencies in ns
+
+def bench_insert_realistic(calls, rng):
+    vm = VendingMachineSimulation()
+    coins = rng.choices([10, 20, 50, 100], weights=[4, 3, 5, 2], k=calls)
+    return time_calls(vm.insert_money, coins)
+
+
+def bench_insert_invalid(calls, rng):
+    # Worst case for the membership scan: every denomination is rejected
+    vm = VendingMachineSimulation()
+    return time_calls(vm.insert_money, [rng.choice([5, 25, 2000]) for _ in range(calls)])
+
+
+def bench_dispense(calls, rng):
+    vm = VendingMachineSimulation()
+
+    def refill(_):
+        vm.current_amount = 100
+
+    return time_calls(lambda _: vm.dispense_drink(), range(calls), refill)
+
+
+def bench_dispense_insufficient(calls, rng):
+    vm = VendingMachineSimulation()
+    return time_calls(lambda _: vm.dispense_drink(), range(calls))
+
+
+def bench_cancel(calls, rng):
+    vm = VendingMachineSimulation()
+
+    def credit(_):
+        vm.current_amount = 70
+
+    return time_calls(lambda _: vm.cancel_transaction(), range(calls), credit)
+
+
+def bench_simulate_realistic(calls, rng):
+    vm = VendingMachineSimulation()
+    inputs = rng.choices(["10", "20", "50", "100", "dispense", "cancel"],
+                         weights=[3, 3, 5, 2, 4, 1], k=calls)
+    return time_calls(vm.simulate_transition, inputs)
+
+
+def bench_simulate_invalid(calls, rng):
+    vm = VendingMachineSimulation()
+    inputs = rng.choices(["abc", "15", "99999"], k=calls)
+    return time_calls(vm.simulate_transition, inputs)
+
+
+def bench_display_history(calls, rng):
+    vm = VendingMachineSimulation()
+    for coin in rng.choices([10, 20, 50], k=1000):
+        vm.insert_money(coin)
+    return time_calls(lambda _: vm.display_history(), range(calls))
+
+
+BENCHMARKS = {
+    "insert_money/realistic": bench_insert_realistic,
+    "insert_money/invalid": bench_insert_invalid,
+    "dispense_drink/success": bench_dispense,
+    "dispense_drink/insufficient": bench_dispense_insufficient,
+    "cancel_transaction": bench_cancel,
+    "simulate_transition/realistic": bench_simulate_realistic,
+    "simulate_transition/invalid": bench_simulate_invalid,
+    "display_history": bench_display_history,
+}
+
+
+def run_benchmarks(calls=DEFAULT_CALLS, seed=0, names=None):
+    """Run the selected benchmarks and return a JSON-serialisable report."""
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        if names and not any(name.startswith(n) for n in names):
+            continue
+        rng = random.Random(seed)
+        results[name] = summarize(bench(calls, rng))
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "calls": calls,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return (name, baseline ops/sec, current ops/sec, change) for regressions."""
+    regressions = []
+    for name, current in report["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            continue
+        change = current["ops_per_sec"] / old["ops_per_sec"] - 1
+        if change < -threshold:
+            regressions.append((name, old["ops_per_sec"], current["ops_per_sec"], change))
+    return regressions
+
+
+def format_report(report, baseline=None):
+    lines = [f"{'benchmark':<32} {'ops/sec':>12} {'p50 ns':>9} {'p90 ns':>9} {'p99 ns':>9}"
+             + ("   vs base" if baseline else "")]
+    for name, r in report["results"].items():
+        line = f"{name:<32} {r['ops_per_sec']:>12,.0f} {r['p50_ns']:>9} {r['p90_ns']:>9} {r['p99_ns']:>9}"
+        old = baseline.get("results", {}).get(name) if baseline else None
+        if old:
+            line += f"   {r['ops_per_sec'] / old['ops_per_sec'] - 1:+8.1%}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the vending machine core.")
+    parser.add_argument("--calls", type=int, default=DEFAULT_CALLS, help="calls per benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", help="benchmark name prefixes to run")
+    parser.add_argument("--output", help="save results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this saved JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed ops/sec drop before flagging (default 0.10)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.calls, args.seed, args.only)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(format_report(report, baseline))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+    if baseline:
+        regressions = compare(report, baseline, args.threshold)
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old:,.0f} -> {new:,.0f} ops/sec ({change:+.1%})")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
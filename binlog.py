@@ -0,0 +1,225 @@
+"""Fixed-width binary vending event log with a memory-mapped reader.
+
+A file is a 16-byte header followed by 24-byte little-endian records:
+
+    offset  type    field
+    0       int64   timestamp (milliseconds since the epoch)
+    8       uint32  machine id
+    12      uint8   event kind (INSERT, DISPENSE, CANCEL, ...)
+    13      int8    drink index (-1 when not applicable)
+    14      uint16  denomination inserted (0 when not applicable)
+    16      int32   change paid out
+    20      int32   amount (purchase total or refund)
+
+EventReader maps the file and exposes the records without copying, either as
+struct tuples or, with NumPy installed, as a structured array whose columns
+can be aggregated directly. Arrays from as_array() stay valid after the
+reader is closed; the mapping is released once the last of them is freed.
+An empty file reads as a log with no records.
+"""
+import mmap
+import os
+import struct
+import time
+
+from dfa import VendingMachineSimulation, INSERTED, DISPENSED, CANCELLED
+from history import INSERT as INSERT_NAME, DISPENSE as DISPENSE_NAME, CANCEL as CANCEL_NAME
+
+MAGIC = b"VMEV"
+VERSION = 1
+HEADER = struct.Struct("<4sHH8x")
+RECORD = struct.Struct("<qIBbHii")
+FIELDS = ("timestamp", "machine_id", "kind", "drink", "denomination", "change", "amount")
+
+# Event kinds
+INSERT = 1
+DISPENSE = 2
+CANCEL = 3
+PURCHASE = 4
+REFILL = 5
+KIND_NAMES = {INSERT: INSERT_NAME, DISPENSE: DISPENSE_NAME, CANCEL: CANCEL_NAME,
+              PURCHASE: "purchase", REFILL: "refill"}
+
+
+def numpy_dtype():
+    """Structured dtype matching RECORD, for zero-copy NumPy views."""
+    import numpy as np
+    return np.dtype([
+        ("timestamp", "<i8"),
+        ("machine_id", "<u4"),
+        ("kind", "u1"),
+        ("drink", "i1"),
+        ("denomination", "<u2"),
+        ("change", "<i4"),
+        ("amount", "<i4"),
+    ])
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+class EventWriter:
+    def __init__(self, path):
+        self.path = path
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "ab")
+        if new:
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+
+    def write(self, kind, machine_id=0, denomination=0, drink=-1, change=0, amount=0,
+              timestamp=None):
+        if timestamp is None:
+            timestamp = now_ms()
+        self.file.write(RECORD.pack(timestamp, machine_id, kind, drink, denomination,
+                                    change, amount))
+
+    def write_many(self, records):
+        """Write an iterable of tuples in FIELDS order."""
+        pack = RECORD.pack
+        self.file.write(b"".join(pack(*record) for record in records))
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventReader:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        if size == 0:
+            # Nothing written yet; mmap cannot map an empty file
+            self.map = None
+            self.count = 0
+            self.view = memoryview(b"")
+            return
+        if size < HEADER.size:
+            self.file.close()
+            raise ValueError(f"{path} is not a vending event log")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, record_size = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a vending event log")
+        if version != VERSION or record_size != RECORD.size:
+            raise ValueError(f"Unsupported event log version {version} in {path}")
+
+        # Ignore a partially written final record
+        self.count = (len(self.map) - HEADER.size) // RECORD.size
+        self.view = memoryview(self.map)[HEADER.size:HEADER.size + self.count * RECORD.size]
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return RECORD.iter_unpack(self.view)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return RECORD.unpack_from(self.view, index * RECORD.size)
+
+    def as_array(self):
+        """Zero-copy NumPy structured array over the mapped records."""
+        import numpy as np
+        return np.frombuffer(self.view, dtype=numpy_dtype(), count=self.count)
+
+    def totals(self):
+        """Event counts, cash inserted, drinks sold, change and refunds."""
+        try:
+            records = self.as_array()
+        except ImportError:
+            return self.totals_python()
+
+        import numpy as np
+        kinds = records["kind"]
+        counts = np.bincount(kinds, minlength=max(KIND_NAMES) + 1)
+        return {
+            "events": int(self.count),
+            "by_kind": {KIND_NAMES.get(k, str(k)): int(n) for k, n in enumerate(counts) if n},
+            "inserted": int(records["denomination"][kinds == INSERT].sum(dtype=np.int64)),
+            "drinks": int(counts[DISPENSE]),
+            "change": int(records["change"].sum(dtype=np.int64)),
+            "refunded": int(records["amount"][kinds == CANCEL].sum(dtype=np.int64)),
+        }
+
+    def totals_python(self):
+        by_kind = {}
+        inserted = change = refunded = 0
+        for _, _, kind, _, denomination, record_change, amount in self:
+            by_kind[kind] = by_kind.get(kind, 0) + 1
+            if kind == INSERT:
+                inserted += denomination
+            elif kind == CANCEL:
+                refunded += amount
+            change += record_change
+        return {
+            "events": self.count,
+            "by_kind": {KIND_NAMES.get(k, str(k)): n for k, n in sorted(by_kind.items())},
+            "inserted": inserted,
+            "drinks": by_kind.get(DISPENSE, 0),
+            "change": change,
+            "refunded": refunded,
+        }
+
+    def close(self):
+        try:
+            self.view.release()
+            if self.map is not None:
+                self.map.close()
+        except BufferError:
+            # Arrays from as_array() still use the mapping; it goes when they do
+            pass
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def convert_events(events, writer, machine_id=0, timestamp=None, vm=None):
+    """Replay (event, amount) pairs through a machine and write what it accepted.
+
+    As in replay.replay, the machine decides: rejected coins, failed
+    dispenses and empty cancels are not written. Dispense records carry the
+    price. The machine keeps change as credit, so no money leaves on a
+    dispense: it is paid out as the refund on the later cancel record.
+    Returns the records written.
+    """
+    if vm is None:
+        vm = VendingMachineSimulation()
+    written = 0
+    for event, amount in events:
+        if event == "insert":
+            try:
+                status, value = vm.insert_status(int(amount))
+            except (TypeError, ValueError):
+                continue
+            if status == INSERTED:
+                writer.write(INSERT, machine_id, denomination=value, timestamp=timestamp)
+                written += 1
+        elif event == "dispense":
+            status, _ = vm.dispense_status()
+            if status == DISPENSED:
+                writer.write(DISPENSE, machine_id, amount=vm.drink_price, timestamp=timestamp)
+                written += 1
+        elif event == "cancel":
+            status, value = vm.cancel_status()
+            if status == CANCELLED:
+                writer.write(CANCEL, machine_id, amount=value, timestamp=timestamp)
+                written += 1
+    return written
@@ -0,0 +1,133 @@
+"""Change-making planner over a finite cash inventory.
+
+Decides which coins and notes pay out an amount, using as few pieces as
+possible and never more of a denomination than the machine holds.
+
+An unbounded minimum-coin table is precomputed up to max_amount once, so the
+common case is a table walk. Only when that plan needs pieces the machine has
+run out of does the planner fall back to a bounded DP, memoized per
+(amount, inventory) so repeated situations are a dict lookup. Greedy is not
+enough for these denominations: 80 is 40+40, not 50+20+10.
+"""
+from math import gcd
+
+DEFAULT_MAX_AMOUNT = 2000
+MEMO_LIMIT = 4096
+
+
+class ChangePlanner:
+    def __init__(self, denominations, inventory=None, max_amount=DEFAULT_MAX_AMOUNT):
+        self.denominations = sorted(set(denominations), reverse=True)
+        self.inventory = {d: 0 for d in self.denominations}
+        if inventory:
+            self.inventory.update(inventory)
+        self.step = 0
+        for d in self.denominations:
+            self.step = gcd(self.step, d)
+        self.max_amount = max_amount
+        self.memo = {}
+        self.build_table()
+
+    def build_table(self):
+        """Fewest pieces and the first piece to use for every multiple of step."""
+        size = self.max_amount // self.step + 1
+        coins = [d // self.step for d in self.denominations]
+        unreachable = self.unreachable = size + 1
+        self.fewest = [0] + [unreachable] * (size - 1)
+        self.first = [0] * size
+        for units in range(1, size):
+            best = unreachable
+            for coin in coins:
+                if coin <= units and self.fewest[units - coin] + 1 < best:
+                    best = self.fewest[units - coin] + 1
+                    self.first[units] = coin * self.step
+            self.fewest[units] = best
+
+    def plan(self, amount):
+        """{denomination: count} paying out amount from the inventory, or None."""
+        if amount == 0:
+            return {}
+        if amount < 0 or amount % self.step:
+            return None
+
+        if amount <= self.max_amount:
+            # No mix of these denominations makes the amount, whatever the inventory
+            if self.fewest[amount // self.step] == self.unreachable:
+                return None
+            plan = self.table_plan(amount)
+            if all(self.inventory[d] >= n for d, n in plan.items()):
+                return plan
+
+        key = (amount, tuple(self.inventory[d] for d in self.denominations))
+        if key not in self.memo:
+            if len(self.memo) >= MEMO_LIMIT:
+                self.memo.clear()
+            self.memo[key] = self.bounded_plan(amount)
+        plan = self.memo[key]
+        return dict(plan) if plan is not None else None
+
+    def table_plan(self, amount):
+        plan = {}
+        while amount:
+            coin = self.first[amount // self.step]
+            plan[coin] = plan.get(coin, 0) + 1
+            amount -= coin
+        return plan
+
+    def bounded_plan(self, amount):
+        """Fewest-piece plan that respects the inventory, by DP over denominations."""
+        denominations = self.denominations
+        limits = [self.inventory[d] for d in denominations]
+        solved = {}
+
+        def solve(i, remaining):
+            # (pieces, counts) for remaining using denominations[i:], or None
+            if remaining == 0:
+                return 0, ()
+            if i == len(denominations):
+                return None
+            key = (i, remaining)
+            if key in solved:
+                return solved[key]
+
+            d = denominations[i]
+            best = None
+            for n in range(min(limits[i], remaining // d), -1, -1):
+                rest = solve(i + 1, remaining - n * d)
+                if rest is not None and (best is None or rest[0] + n < best[0]):
+                    best = (rest[0] + n, ((d, n),) + rest[1] if n else rest[1])
+            solved[key] = best
+            return best
+
+        best = solve(0, amount)
+        if best is None:
+            return None
+        return dict(best[1])
+
+    def can_pay(self, amount):
+        return self.plan(amount) is not None
+
+    def deposit(self, denomination, count=1):
+        self.inventory[denomination] += count
+
+    def pay_out(self, amount):
+        """Remove the pieces for amount from the inventory; returns the plan or None."""
+        plan = self.plan(amount)
+        if plan is None:
+            return None
+        for d, n in plan.items():
+            self.inventory[d] -= n
+        return plan
+
+    def snapshot(self):
+        return {str(d): n for d, n in self.inventory.items()}
+
+    def restore(self, snapshot):
+        for d, n in snapshot.items():
+            self.inventory[int(d)] = n
+
+
+def format_plan(plan):
+    if not plan:
+        return "nothing"
+    return ", ".join(f"{n} x {d}" for d, n in sorted(plan.items(), reverse=True))
@@ -0,0 +1,111 @@
+"""Single command-line entry point for the vending machine tools.
+
+    python cli.py interactive [--journal PATH]
+    python cli.py replay FILE
+    python cli.py serve [--host HOST] [--port PORT]
+    python cli.py bench [bench.py options...]
+    python cli.py gui {main,trial} [--journal PATH]
+
+Only argparse is imported up front. Each subcommand imports its own modules
+when it runs, so headless commands never load tkinter (or NumPy), and short
+runs do not pay for tools they do not use. --timing prints how long the CLI
+and the subcommand's modules took to import.
+"""
+import time
+
+_started = time.perf_counter()
+
+import argparse
+import importlib
+import sys
+
+CLI_IMPORT_SECONDS = time.perf_counter() - _started
+import_seconds = {}
+
+
+def load(name):
+    """Import a module on demand, recording how long it took."""
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    import_seconds.setdefault(name, time.perf_counter() - start)
+    return module
+
+
+def interactive(args):
+    load("dfa").run_simulation(args.journal)
+    return 0
+
+
+def replay(args):
+    load("dfa").replay_log(args.file)
+    return 0
+
+
+def serve(args):
+    load("server").serve(args.host, args.port)
+    return 0
+
+
+def bench(args):
+    return load("bench").main(args.options)
+
+
+def gui(args):
+    if args.app == "main":
+        load("main").main()
+    else:
+        load("trial").main(args.journal)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="JKUAT vending machine tools.")
+    parser.add_argument("--timing", action="store_true",
+                        help="report CLI and module import times on stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("interactive", help="text-based simulation")
+    p.add_argument("--journal", help="journal transitions here and recover from it")
+    p.set_defaults(run=interactive)
+
+    p = commands.add_parser("replay", help="replay a CSV or JSONL event log")
+    p.add_argument("file")
+    p.set_defaults(run=replay)
+
+    p = commands.add_parser("serve", help="serve the text protocol over TCP")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8750)
+    p.set_defaults(run=serve)
+
+    # Everything after "bench" is passed through to bench.py
+    p = commands.add_parser("bench", help="run the micro-benchmarks (options go to bench.py)")
+    p.set_defaults(run=bench)
+
+    p = commands.add_parser("gui", help="start a Tk interface")
+    p.add_argument("app", choices=["main", "trial"])
+    p.add_argument("--journal", help="trial only: journal and recover the machine state")
+    p.set_defaults(run=gui)
+    return parser
+
+
+def format_timing():
+    lines = [f"cli import: {CLI_IMPORT_SECONDS * 1000:.2f} ms"]
+    lines += [f"{name} import: {seconds * 1000:.2f} ms" for name, seconds in import_seconds.items()]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command != "bench":
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    args.options = extra
+    try:
+        return args.run(args)
+    finally:
+        if args.timing:
+            print(format_timing(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
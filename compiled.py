@@ -0,0 +1,144 @@
+"""Compiled, table-driven form of the vending machine automaton.
+
+The machine spec (denominations, drink price and a credit cap) is turned into
+a dense transition table. States are integer ids (credit // step) and inputs
+are alphabet indices, so a single step is one array lookup.
+"""
+from array import array
+from functools import reduce
+from math import gcd
+
+from dfa import (VendingMachineSimulation, INSERTED, DISPENSED, INSUFFICIENT_FUNDS,
+                 CANCELLED, NOTHING_TO_REFUND, CREDIT_LIMIT)
+from states import table_for
+
+DEFAULT_MAX_CREDIT = 2000
+
+
+class CompiledMachine:
+    def __init__(self, denominations, drink_price, max_credit=DEFAULT_MAX_CREDIT, keep_change=True):
+        self.denominations = list(denominations)
+        self.drink_price = drink_price
+        # False models main.py, which pays the change out and returns to q0
+        self.keep_change = keep_change
+
+        # Every reachable credit is a multiple of the gcd of all amounts involved
+        self.step_size = reduce(gcd, self.denominations, drink_price)
+        self.max_credit = max_credit - max_credit % self.step_size
+        self.n_states = self.max_credit // self.step_size + 1
+        # State ids are the shared credit ids of states.StateTable
+        self.state_table = table_for(self.denominations, drink_price)
+
+        # Input alphabet: one symbol per denomination, then dispense and cancel
+        self.alphabet = self.denominations + ["dispense", "cancel"]
+        self.n_inputs = len(self.alphabet)
+        self.dispense_index = len(self.denominations)
+        self.cancel_index = self.dispense_index + 1
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.alphabet)}
+
+        self.build_tables()
+        self.reset()
+
+    @classmethod
+    def from_simulation(cls, vm, max_credit=DEFAULT_MAX_CREDIT):
+        """Compile the spec of an existing VendingMachineSimulation."""
+        return cls(vm.valid_denominations, vm.drink_price, max_credit)
+
+    def build_tables(self):
+        """Fill the flat next-state, status and dispensed tables."""
+        size = self.n_states * self.n_inputs
+        self.next_state = array("i", [0]) * size
+        self.status = array("b", [0]) * size
+        self.dispensed = array("b", [0]) * size
+
+        step = self.step_size
+        price_steps = self.drink_price // step
+        max_state = self.n_states - 1
+
+        for state in range(self.n_states):
+            row = state * self.n_inputs
+            for i, denomination in enumerate(self.denominations):
+                target = state + denomination // step
+                if target > max_state:
+                    self.next_state[row + i] = state
+                    self.status[row + i] = CREDIT_LIMIT
+                else:
+                    self.next_state[row + i] = target
+                    self.status[row + i] = INSERTED
+
+            # Dispense keeps the change as credit, like VendingMachineSimulation
+            k = row + self.dispense_index
+            if state >= price_steps:
+                self.next_state[k] = state - price_steps if self.keep_change else 0
+                self.status[k] = DISPENSED
+                self.dispensed[k] = 1
+            else:
+                self.next_state[k] = state
+                self.status[k] = INSUFFICIENT_FUNDS
+
+            k = row + self.cancel_index
+            self.next_state[k] = 0
+            self.status[k] = CANCELLED if state else NOTHING_TO_REFUND
+
+    def reset(self):
+        """Return the machine to q0 and clear the counters."""
+        self.state = 0
+        self.drinks_dispensed = 0
+
+    def amount(self, state=None):
+        """Credit in KShs held in a state (the current one by default)."""
+        if state is None:
+            state = self.state
+        return state * self.step_size
+
+    def state_name(self, state=None):
+        """Display name of a state, from the name table dfa.py also uses."""
+        if state is None:
+            state = self.state
+        return self.state_table.name(state)
+
+    def encode(self, inputs):
+        """Translate denominations / 'dispense' / 'cancel' into alphabet indices."""
+        indices = array("B")
+        lookup = self.symbol_index
+        for value in inputs:
+            if value not in lookup:
+                try:
+                    value = int(value)
+                except ValueError:
+                    raise ValueError(f"Invalid input: {value}")
+                if value not in lookup:
+                    raise ValueError(f"Invalid denomination: {value}")
+            indices.append(lookup[value])
+        return indices
+
+    def step(self, index):
+        """Apply one input index and return its outcome code."""
+        k = self.state * self.n_inputs + index
+        self.drinks_dispensed += self.dispensed[k]
+        self.state = self.next_state[k]
+        return self.status[k]
+
+    def run(self, indices):
+        """Apply a sequence of input indices and return the final state id."""
+        next_state = self.next_state
+        dispensed = self.dispensed
+        n_inputs = self.n_inputs
+        state = self.state
+        drinks = 0
+
+        for index in indices:
+            k = state * n_inputs + index
+            drinks += dispensed[k]
+            state = next_state[k]
+
+        self.state = state
+        self.drinks_dispensed += drinks
+        return state
+
+
+def compile_machine(vm=None, max_credit=DEFAULT_MAX_CREDIT):
+    """Compile a VendingMachineSimulation (a default one if none is given)."""
+    if vm is None:
+        vm = VendingMachineSimulation()
+    return CompiledMachine.from_simulation(vm, max_credit)
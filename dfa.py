@@ -1,64 +1,216 @@
+from array import array
+
+from change import format_plan
+from history import TransactionHistory, DEFAULT_CAPACITY, INSERT, DISPENSE, CANCEL
+from instrument import enable_from_env
+from states import table_for
+
+# Outcome codes for a single machine step
+INSERTED = 0
+DISPENSED = 1
+INSUFFICIENT_FUNDS = 2
+CANCELLED = 3
+NOTHING_TO_REFUND = 4
+INVALID_INPUT = 5
+CREDIT_LIMIT = 6
+NO_CHANGE = 7
+
+# BatchResult value for an input that is not a number at all
+INVALID_VALUE = -1
+
+class BatchResult:
+    """Compact results of VendingMachineSimulation.run_batch.
+    
+    One entry per input in parallel arrays: the status code, the state id
+    after the step and a value (denomination inserted, change, amount
+    missing or refund). Messages are rendered only when asked for.
+    """
+    
+    def __init__(self, vm):
+        self.vm = vm
+        self.statuses = array("b")
+        self.states = array("i")
+        self.values = array("q")
+    
+    def append(self, status, state, value):
+        self.statuses.append(status)
+        self.states.append(state)
+        self.values.append(value)
+    
+    def __len__(self):
+        return len(self.statuses)
+    
+    def __getitem__(self, i):
+        return self.statuses[i], self.states[i], self.values[i]
+    
+    def count(self, status):
+        return self.statuses.count(status)
+    
+    def message(self, i):
+        status, state, value = self[i]
+        if status == INVALID_INPUT and value == INVALID_VALUE:
+            return "Invalid input"
+        return self.vm.render(status, value, state)
+    
+    def messages(self):
+        for i in range(len(self)):
+            yield self.message(i)
+
 class VendingMachineSimulation:
-    def __init__(self):
+    # Methods that change state, in the form a journal can replay them
+    JOURNALED_METHODS = ("insert_money", "dispense_drink", "cancel_transaction", "simulate_transition",
+                         "run_batch")
+    
+    def __init__(self, history_capacity=DEFAULT_CAPACITY, change_planner=None):
         # Initialize the machine with 0 money
         self.current_amount = 0
         self.drink_price = 50
         self.valid_denominations = [10, 20, 40, 50, 100, 200, 500, 1000]
-        self.transaction_history = []
+        self.transaction_history = TransactionHistory(history_capacity)
         self.drinks_dispensed = 0
-        self.current_state = "q0"
+        # States are interned ids; names like "q50" come from the table for display
+        self.state_table = table_for(self.valid_denominations, self.drink_price)
+        self.state = 0
+        # Optional change.ChangePlanner tracking the cash held by the machine
+        self.change_planner = change_planner
+        self.last_payout = {}
+    
+    @property
+    def current_state(self):
+        """Display name of the current state."""
+        return self.state_table.name(self.state)
     
     def insert_money(self, denomination):
         """Insert money into the vending machine."""
+        return self.render(*self.insert_status(denomination))
+    
+    def dispense_drink(self):
+        """Attempt to dispense a drink if enough money is inserted."""
+        return self.render(*self.dispense_status())
+    
+    def cancel_transaction(self):
+        """Cancel the current transaction and return all inserted money."""
+        status, refund = self.cancel_status()
+        if status == CANCELLED and self.change_planner:
+            return (f"Transaction cancelled. {refund} KShs returned as "
+                    f"{format_plan(self.last_payout)}. New state: q0")
+        return self.render(status, refund)
+    
+    def insert_status(self, denomination):
+        """Core of insert_money: returns (status code, denomination)."""
         if denomination not in self.valid_denominations:
-            return f"Error: {denomination} is not a valid denomination."
+            return INVALID_INPUT, denomination
         
         self.current_amount += denomination
-        self.current_state = f"q{self.current_amount}"
+        self.state = self.state_table.id_of(self.current_amount)
+        if self.change_planner:
+            self.change_planner.deposit(denomination)
         
         # Add to transaction history
-        self.transaction_history.append(f"Inserted {denomination} KShs")
-        
-        return f"Inserted {denomination} KShs. Current amount: {self.current_amount} KShs"
+        self.transaction_history.append(INSERT, denomination)
+        return INSERTED, denomination
     
-    def dispense_drink(self):
-        """Attempt to dispense a drink if enough money is inserted."""
+    def dispense_status(self):
+        """Core of dispense_drink: returns (status code, change or amount missing)."""
         if self.current_amount < self.drink_price:
-            return f"Insufficient funds. Please insert at least {self.drink_price - self.current_amount} more KShs"
+            return INSUFFICIENT_FUNDS, self.drink_price - self.current_amount
         
-        # Dispense drink and calculate change
-        self.drinks_dispensed += 1
+        # Refuse the sale if the credit left over could not be paid back
         change = self.current_amount - self.drink_price
-        old_state = self.current_state
+        if self.change_planner and not self.change_planner.can_pay(change):
+            return NO_CHANGE, change
         
-        # Update state
+        # Dispense drink and keep the change as credit
+        self.drinks_dispensed += 1
         self.current_amount = change
-        self.current_state = f"q{self.current_amount}"
+        self.state = self.state_table.id_of(change)
         
         # Add to transaction history
-        if change > 0:
-            self.transaction_history.append(f"Drink dispensed. Change: {change} KShs")
-            return f"Drink dispensed! Your change is {change} KShs. New state: {self.current_state}"
-        else:
-            self.transaction_history.append("Drink dispensed. No change.")
-            return "Drink dispensed! No change. New state: q0"
+        self.transaction_history.append(DISPENSE, self.drink_price, change)
+        return DISPENSED, change
     
-    def cancel_transaction(self):
-        """Cancel the current transaction and return all inserted money."""
+    def cancel_status(self):
+        """Core of cancel_transaction: returns (status code, refund)."""
         if self.current_amount == 0:
-            return "No money to return."
+            return NOTHING_TO_REFUND, 0
         
         refund = self.current_amount
-        old_state = self.current_state
-        
-        # Update state
         self.current_amount = 0
-        self.current_state = "q0"
+        self.state = 0
+        if self.change_planner:
+            self.last_payout = self.change_planner.pay_out(refund)
         
         # Add to transaction history
-        self.transaction_history.append(f"Transaction cancelled. Refunded {refund} KShs")
+        self.transaction_history.append(CANCEL, refund)
+        return CANCELLED, refund
+    
+    def render(self, status, value, state=None):
+        """Message text for a step result; state is the state id after the step."""
+        if state is None:
+            state = self.state
+        if status == INSERTED:
+            return f"Inserted {value} KShs. Current amount: {self.state_table.amount(state)} KShs"
+        if status == DISPENSED:
+            if value > 0:
+                return (f"Drink dispensed! Your change is {value} KShs. "
+                        f"New state: {self.state_table.name(state)}")
+            return "Drink dispensed! No change. New state: q0"
+        if status == INSUFFICIENT_FUNDS:
+            return f"Insufficient funds. Please insert at least {value} more KShs"
+        if status == NO_CHANGE:
+            return f"Cannot make change for {value} KShs. Please insert the exact amount or cancel."
+        if status == CANCELLED:
+            return f"Transaction cancelled. {value} KShs returned. New state: q0"
+        if status == NOTHING_TO_REFUND:
+            return "No money to return."
+        if status == INVALID_INPUT:
+            return f"Error: {value} is not a valid denomination."
+        return f"Unknown status {status}"
+    
+    def run_batch(self, inputs):
+        """Apply many inputs and return a BatchResult; no message text is built.
         
-        return f"Transaction cancelled. {refund} KShs returned. New state: q0"
+        Inputs are what simulate_transition accepts: denominations (int or
+        numeric string), 'dispense' or 'cancel'. Any iterable works,
+        including a generator, journaled or not.
+        """
+        result = BatchResult(self)
+        append = result.append
+        for value in inputs:
+            if value == "dispense":
+                status, amount = self.dispense_status()
+            elif value == "cancel":
+                status, amount = self.cancel_status()
+            elif isinstance(value, int):
+                status, amount = self.insert_status(value)
+            elif isinstance(value, str) and value.strip().isdecimal():
+                status, amount = self.insert_status(int(value))
+            else:
+                # Floats and anything else: int() would truncate 10.7 to a 10 KShs coin
+                status, amount = INVALID_INPUT, INVALID_VALUE
+            append(status, self.state, amount)
+        return result
+    
+    def snapshot(self):
+        """Plain-data copy of the machine state."""
+        snapshot = {
+            "current_amount": self.current_amount,
+            "drinks_dispensed": self.drinks_dispensed,
+            "history": self.transaction_history.records(),
+        }
+        if self.change_planner:
+            snapshot["cash"] = self.change_planner.snapshot()
+        return snapshot
+    
+    def restore(self, snapshot):
+        self.current_amount = snapshot["current_amount"]
+        self.state = self.state_table.id_of(self.current_amount)
+        self.drinks_dispensed = snapshot["drinks_dispensed"]
+        self.transaction_history.clear()
+        for entry in snapshot["history"]:
+            self.transaction_history.append(*entry)
+        if self.change_planner and "cash" in snapshot:
+            self.change_planner.restore(snapshot["cash"])
     
     def display_state(self):
         """Show the current state of the machine."""
@@ -69,7 +221,7 @@ class VendingMachineSimulation:
         if not self.transaction_history:
             return "No transactions yet."
         
-        history = "\n".join(f"{i+1}. {t}" for i, t in enumerate(self.transaction_history[-5:]))
+        history = "\n".join(f"{i+1}. {t}" for i, t in enumerate(self.transaction_history.recent(5)))
         return f"Recent Transactions:\n{history}"
     
     def simulate_transition(self, input_value=None):
@@ -77,7 +229,7 @@ class VendingMachineSimulation:
         if input_value is None:
             return "Please specify an input (coin/note denomination or 'dispense')"
         
-        old_state = self.current_state
+        old_state = self.state
         result = ""
         
         if input_value == "dispense":
@@ -94,7 +246,8 @@ class VendingMachineSimulation:
             except ValueError:
                 return f"Invalid input: {input_value}"
         
-        transition = f"Transition: {old_state} --({input_value})--> {self.current_state}"
+        transition = (f"Transition: {self.state_table.name(old_state)} "
+                      f"--({input_value})--> {self.current_state}")
         return f"{result}\n{transition}"
     
     def draw_simple_diagram(self):
@@ -123,9 +276,19 @@ class VendingMachineSimulation:
         ]
         return '\n'.join(diagram)
 
-def run_simulation():
-    """Run an interactive text-based simulation of the vending machine."""
-    vm = VendingMachineSimulation()
+def run_simulation(journal_path=None, machine=None):
+    """Run an interactive text-based simulation of the vending machine.
+    
+    machine can be any object with the VendingMachineSimulation commands,
+    such as an automaton.AutomatonMachine.
+    """
+    enable_from_env(VendingMachineSimulation)
+    vm = machine if machine is not None else VendingMachineSimulation()
+    
+    # Optionally journal every transition and recover the previous session
+    if journal_path:
+        from journal import JournaledMachine
+        vm = JournaledMachine(vm, journal_path)
     
     print("=== JKUAT Soft Drink Vending Machine Simulation ===")
     print("All drinks cost 50 KShs")
@@ -133,6 +296,8 @@ def run_simulation():
     print("\nCommands:")
     print("- insert X: Insert X KShs (e.g., 'insert 50')")
     print("- dispense: Attempt to dispense a drink")
+    if len(getattr(vm, "products", ())) > 1:
+        print(f"- dispense <product>: Dispense one of {', '.join(vm.products)}")
     print("- cancel: Cancel transaction and get refund")
     print("- state: Display current state")
     print("- history: Show transaction history")
@@ -141,39 +306,70 @@ def run_simulation():
     print("===========================================\n")
     
     while True:
-        command = input("\nEnter command > ").strip().lower()
+        command = input("\nEnter command > ")
+        output = handle_command(vm, command)
         
-        if command == "exit":
+        if output is None:
             print("Thank you for using the JKUAT Vending Machine Simulation!")
             break
+        
+        print(output)
+
+def handle_command(vm, command):
+    """Execute one text command and return its output, or None for 'exit'."""
+    command = command.strip().lower()
+    
+    if command == "exit":
+        return None
+        
+    elif command.startswith("insert "):
+        try:
+            amount = int(command.split()[1])
+            return f"{vm.insert_money(amount)}\n{vm.display_state()}"
+        except (ValueError, IndexError):
+            return "Invalid command. Usage: insert <amount>"
             
-        elif command.startswith("insert "):
-            try:
-                amount = int(command.split()[1])
-                print(vm.insert_money(amount))
-                print(vm.display_state())
-            except (ValueError, IndexError):
-                print("Invalid command. Usage: insert <amount>")
-                
-        elif command == "dispense":
-            print(vm.dispense_drink())
-            print(vm.display_state())
-            
-        elif command == "cancel":
-            print(vm.cancel_transaction())
-            print(vm.display_state())
-            
-        elif command == "state":
-            print(vm.display_state())
-            
-        elif command == "history":
-            print(vm.display_history())
-            
-        elif command == "diagram":
-            print(vm.draw_simple_diagram())
-            
-        else:
-            print("Unknown command. Valid commands: insert <amount>, dispense, cancel, state, history, diagram, exit")
+    elif command == "dispense":
+        return f"{vm.dispense_drink()}\n{vm.display_state()}"
+        
+    elif command.startswith("dispense "):
+        # Multi-product machines (automaton.AutomatonMachine) take a product name
+        products = {p.lower(): p for p in getattr(vm, "products", ())}
+        product = products.get(command.split(None, 1)[1])
+        if product is None:
+            choices = ", ".join(products.values()) if products else "none, use 'dispense'"
+            return f"Unknown product. Choose from: {choices}"
+        return f"{vm.dispense_drink(product)}\n{vm.display_state()}"
+        
+    elif command == "cancel":
+        return f"{vm.cancel_transaction()}\n{vm.display_state()}"
+        
+    elif command == "state":
+        return vm.display_state()
+        
+    elif command == "history":
+        return vm.display_history()
+        
+    elif command == "diagram":
+        return vm.draw_simple_diagram()
+        
+    else:
+        return ("Unknown command. Valid commands: insert <amount>, dispense [product], cancel, "
+                "state, history, diagram, exit")
+
+def replay_log(path):
+    """Replay a recorded event log and print aggregate results."""
+    from replay import replay_file, format_report
+    
+    print(f"=== Replaying {path} ===")
+    print(format_report(replay_file(path)))
 
 if __name__ == "__main__":
-    run_simulation()
\ No newline at end of file
+    import sys
+    
+    if len(sys.argv) == 3 and sys.argv[1] == "--replay":
+        replay_log(sys.argv[2])
+    elif len(sys.argv) == 3 and sys.argv[1] == "--journal":
+        run_simulation(sys.argv[2])
+    else:
+        run_simulation()
\ No newline at end of file
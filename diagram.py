@@ -0,0 +1,89 @@
+"""Retained-mode state diagram for the Tk canvases.
+
+The static graph is drawn once and the canvas item ids are kept. Each update
+only restyles the previous and current state and the transition between them
+with itemconfig, so the cost of an update does not depend on how many states
+are drawn. No tkinter import is needed; the canvas is passed in.
+"""
+
+STATE_STYLE = {"fill": "white", "outline": "black", "width": 1}
+CURRENT_STYLE = {"fill": "#ffcc00", "outline": "red", "width": 3}
+ACTIVE_EDGE_STYLE = {"fill": "red", "width": 3}
+
+
+class RetainedDiagram:
+    def __init__(self, canvas, name=str):
+        # States are any hashable keys (names or integer ids); name() labels them
+        self.canvas = canvas
+        self.name = name
+        self.states = {}
+        self.edges = {}
+        self.current = None
+        self.active_edge = None
+        self.overflow = None
+        self.overflow_state = None
+
+    def add_state(self, state, oval):
+        """Register the oval drawn for a state."""
+        self.states[state] = oval
+
+    def add_transition(self, from_state, to_state, line, width=1):
+        """Register the line drawn for a transition and its normal width."""
+        self.edges[(from_state, to_state)] = (line, width)
+
+    def set_overflow(self, oval, label):
+        """Hidden slot used to show a current state that has no fixed oval."""
+        self.overflow = (oval, label)
+
+    def oval_for(self, state):
+        if state in self.states:
+            return self.states[state]
+        if self.overflow is not None and state == self.overflow_state:
+            return self.overflow[0]
+        return None
+
+    def set_current(self, state, from_state=None):
+        """Move the current-state highlight and mark the transition just taken."""
+        previous = self.current
+        if from_state is None:
+            if state == previous:
+                return
+            from_state = previous
+
+        if state != previous:
+            oval = self.oval_for(previous)
+            if oval is not None:
+                self.canvas.itemconfig(oval, **STATE_STYLE)
+
+            if state not in self.states and self.overflow is not None:
+                oval, label = self.overflow
+                self.overflow_state = state
+                self.canvas.itemconfig(label, text=self.name(state), state="normal")
+                self.canvas.itemconfig(oval, state="normal")
+            elif self.overflow_state is not None:
+                oval, label = self.overflow
+                self.overflow_state = None
+                self.canvas.itemconfig(oval, state="hidden")
+                self.canvas.itemconfig(label, state="hidden")
+
+            oval = self.oval_for(state)
+            if oval is not None:
+                self.canvas.itemconfig(oval, **CURRENT_STYLE)
+            self.current = state
+
+        self.highlight((from_state, state))
+
+    def highlight(self, edge):
+        """Highlight one registered transition, restoring the previous one."""
+        if edge not in self.edges:
+            edge = None
+        if edge == self.active_edge:
+            return
+
+        if self.active_edge is not None:
+            line, width = self.edges[self.active_edge]
+            self.canvas.itemconfig(line, fill="black", width=width)
+        if edge is not None:
+            line, width = self.edges[edge]
+            self.canvas.itemconfig(line, **ACTIVE_EDGE_STYLE)
+        self.active_edge = edge
@@ -0,0 +1,263 @@
+"""Headless multi-drink vending machine engine.
+
+Holds the product model behind trial.VendingMachineGUI: credit, stock,
+selection, purchases with change and the abstract machine state. It has no
+Tk dependency and no animation delays, so it runs at CPU speed in batch jobs
+and servers; the GUI drives it and only renders the results.
+"""
+from collections import namedtuple
+
+from analytics import SalesAnalytics
+from history import TransactionHistory, DEFAULT_CAPACITY, INSERT, CANCEL
+
+# Abstract machine states
+IDLE = "Idle"
+WAITING = "Waiting for Payment"
+PROCESSING = "Processing Purchase"
+DISPENSING = "Dispensing Drink(s)"
+OUT_OF_STOCK = "Out of Stock"
+STATES = [IDLE, WAITING, PROCESSING, DISPENSING, OUT_OF_STOCK]
+
+DRINK_TYPES = ["Coca Cola", "Sprite", "Fanta", "Pepsi", "Mountain Dew", "7Up"]
+DRINK_PRICE = 50
+VALID_DENOMINATIONS = [10, 20, 40, 50, 100, 200, 500, 1000]
+FULL_STOCK = 5
+STOCK_LIMIT = 10
+# Coins and notes loaded for change when a machine is serviced
+CASH_FLOAT = {10: 20, 20: 20, 40: 10, 50: 10, 100: 5}
+
+# Extra history kinds recorded by the engine
+PURCHASE = "purchase"
+REFILL = "refill"
+
+Purchase = namedtuple("Purchase", "drinks total_cost change")
+
+
+class VendingError(Exception):
+    """A request the machine refuses; title and message are shown to the user."""
+
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+        self.message = message
+
+
+def render_purchase(amount, change):
+    if change > 0:
+        return f"Purchase of {amount} KShs. Change: {change} KShs"
+    return f"Purchase of {amount} KShs. No change."
+
+
+def render_refill(amount, change):
+    return f"Admin: Refilled all drinks to {amount}"
+
+
+class DrinkMachine:
+    # Methods that change state, in the form a journal can replay them
+    JOURNALED_METHODS = ("insert_money", "select_drink", "begin_purchase", "complete_purchase",
+                         "purchase", "cancel_transaction", "check_stock_status", "set_stock",
+                         "refill_all", "reset_counter", "clear_history")
+
+    def __init__(self, drink_types=DRINK_TYPES, drink_price=DRINK_PRICE,
+                 initial_stock=FULL_STOCK, history_capacity=DEFAULT_CAPACITY,
+                 change_planner=None):
+        self.drink_types = list(drink_types)
+        self.drink_price = drink_price
+        self.valid_denominations = list(VALID_DENOMINATIONS)
+        self.current_amount = 0
+        self.drinks_dispensed = 0
+        self.current_state = IDLE
+        self.stock = {drink: initial_stock for drink in self.drink_types}
+        self.selected_drinks = []
+        self.pending_purchase = None
+        # Credit left over from the last sale, still held until it is returned
+        self.change_due = 0
+        self.history = TransactionHistory(history_capacity, {
+            PURCHASE: render_purchase,
+            REFILL: render_refill,
+        })
+        self.analytics = SalesAnalytics()
+        # When set (by a journal), the time events are recorded at instead of now
+        self.event_time = None
+        # Optional change.ChangePlanner tracking the cash held by the machine
+        self.change_planner = change_planner
+        self.last_payout = {}
+
+    def insert_money(self, denomination):
+        """Add a coin or note to the credit."""
+        if denomination not in self.valid_denominations:
+            raise VendingError("Invalid Money", f"{denomination} is not a valid denomination")
+
+        self.current_amount += denomination
+        if self.change_planner:
+            self.change_planner.deposit(denomination)
+        if self.current_state == IDLE:
+            self.current_state = WAITING
+        self.history.append(INSERT, denomination, timestamp=self.event_time)
+
+    def available(self, drink):
+        """Stock of a drink not already claimed by the current selection."""
+        return self.stock[drink] - self.selected_drinks.count(drink)
+
+    def select_drink(self, drink):
+        """Add a drink to the selection if it is in stock and affordable."""
+        if self.available(drink) <= 0:
+            raise VendingError("Out of Stock", f"Sorry, {drink} is out of stock!")
+
+        if self.current_amount < self.drink_price:
+            needed = self.drink_price - self.current_amount
+            raise VendingError("Insufficient Funds", f"Please insert {needed} more KShs")
+
+        self.selected_drinks.append(drink)
+
+    def selection_counts(self):
+        """Selected drinks and how many of each, in selection order."""
+        counts = {}
+        for drink in self.selected_drinks:
+            counts[drink] = counts.get(drink, 0) + 1
+        return counts
+
+    def selection_cost(self):
+        return len(self.selected_drinks) * self.drink_price
+
+    def can_select(self, drink):
+        return self.stock[drink] > 0 and self.current_amount >= self.drink_price
+
+    def can_dispense(self):
+        if self.selected_drinks:
+            return self.current_amount >= self.selection_cost()
+        return self.current_amount >= self.drink_price
+
+    def begin_purchase(self):
+        """Commit the selected drinks: take stock and credit, return the Purchase.
+
+        The machine stays in the dispensing state until complete_purchase()
+        is called, which lets a view animate the drop in between. The drinks
+        leave the selection here, so anything selected or inserted meanwhile
+        belongs to the next purchase.
+        """
+        if not self.selected_drinks:
+            raise VendingError("No Selection", "Please select a drink first!")
+
+        total_cost = self.selection_cost()
+        if self.current_amount < total_cost:
+            needed = total_cost - self.current_amount
+            raise VendingError("Insufficient Funds", f"Please insert {needed} more KShs")
+
+        change = self.current_amount - total_cost
+        if self.change_planner and not self.change_planner.can_pay(change):
+            raise VendingError("Exact Change Only",
+                               f"Cannot make change for {change} KShs. "
+                               "Please insert the exact amount or cancel.")
+
+        self.current_state = DISPENSING
+        drinks = self.selected_drinks
+        self.selected_drinks = []
+        for drink in drinks:
+            self.stock[drink] -= 1
+
+        self.current_amount = change
+        self.change_due = change
+        self.drinks_dispensed += len(drinks)
+        self.pending_purchase = Purchase(drinks, total_cost, change)
+        return self.pending_purchase
+
+    def complete_purchase(self):
+        """Finish the purchase started with begin_purchase()."""
+        purchase = self.pending_purchase
+        if purchase is None:
+            return
+        self.pending_purchase = None
+        self.history.append(PURCHASE, purchase.total_cost, purchase.change, self.event_time)
+        self.analytics.record_sale(purchase.drinks, self.drink_price, self.event_time)
+        # Credit may have changed during the animation
+        self.current_state = WAITING if self.current_amount else IDLE
+
+    def purchase(self):
+        """Select-and-dispense in one step, for headless use."""
+        purchase = self.begin_purchase()
+        self.complete_purchase()
+        self.check_stock_status()
+        return purchase
+
+    def is_busy(self):
+        return self.current_state == DISPENSING
+
+    def check_stock_status(self):
+        """Enter the out-of-stock state when every drink is sold out."""
+        if all(count <= 0 for count in self.stock.values()):
+            self.current_state = OUT_OF_STOCK
+            return True
+        return False
+
+    def cancel_transaction(self):
+        """Clear the selection and return the credit; returns the refund."""
+        if self.current_amount == 0 and not self.selected_drinks:
+            raise VendingError("Nothing to Return", "No money to return")
+
+        refund = self.current_amount
+        abandoned = bool(self.selected_drinks)
+        if self.change_planner:
+            self.last_payout = self.change_planner.pay_out(refund)
+        self.current_amount = 0
+        self.current_state = IDLE
+        self.selected_drinks = []
+        self.history.append(CANCEL, refund, timestamp=self.event_time)
+        self.analytics.record_cancel(refund, self.change_due, abandoned)
+        self.change_due = 0
+        return refund
+
+    def leave_out_of_stock(self):
+        if self.current_state == OUT_OF_STOCK and any(count > 0 for count in self.stock.values()):
+            self.current_state = IDLE
+            return True
+        return False
+
+    def set_stock(self, drink, count):
+        """Set the stock of one drink, clamped to 0..STOCK_LIMIT; returns the new level."""
+        self.stock[drink] = max(0, min(count, STOCK_LIMIT))
+        self.leave_out_of_stock()
+        return self.stock[drink]
+
+    def refill_all(self, level=FULL_STOCK):
+        for drink in self.drink_types:
+            self.stock[drink] = level
+        self.history.append(REFILL, level, timestamp=self.event_time)
+        self.leave_out_of_stock()
+
+    def reset_counter(self):
+        """Zero the dispense counter and the sales statistics built on it."""
+        self.drinks_dispensed = 0
+        self.analytics.reset()
+
+    def clear_history(self):
+        self.history.clear()
+
+    def snapshot(self):
+        """Plain-data copy of the machine state (not taken mid-purchase)."""
+        return {
+            "current_amount": self.current_amount,
+            "drinks_dispensed": self.drinks_dispensed,
+            "current_state": self.current_state,
+            "stock": dict(self.stock),
+            "selected_drinks": list(self.selected_drinks),
+            "change_due": self.change_due,
+            "history": self.history.records(),
+            "analytics": self.analytics.snapshot(),
+            "cash": self.change_planner.snapshot() if self.change_planner else None,
+        }
+
+    def restore(self, snapshot):
+        self.current_amount = snapshot["current_amount"]
+        self.drinks_dispensed = snapshot["drinks_dispensed"]
+        self.current_state = snapshot["current_state"]
+        self.stock.update(snapshot["stock"])
+        self.selected_drinks = list(snapshot["selected_drinks"])
+        self.change_due = snapshot.get("change_due", 0)
+        self.history.clear()
+        for entry in snapshot["history"]:
+            self.history.append(*entry)
+        if "analytics" in snapshot:
+            self.analytics.restore(snapshot["analytics"])
+        if self.change_planner and snapshot.get("cash"):
+            self.change_planner.restore(snapshot["cash"])
@@ -0,0 +1,222 @@
+"""Equivalence checking between the machine models.
+
+Each model is viewed as a Mealy automaton over the shared dfa.py alphabet
+(denominations, 'dispense', 'cancel') whose output is the step's outcome code:
+
+    dfa    dfa.py: change stays as credit after a dispense
+    main   main.py: change is paid out and the machine returns to q0
+    trial  the trial.py engine with one drink bought per 'dispense' and
+           finite stock, so it can also answer SOLD_OUT
+
+Two models are equivalent when every input sequence produces the same
+outputs. equivalent() decides this with the Hopcroft-Karp union-find
+algorithm, which is near-linear in the number of states. When the models
+differ, a breadth-first search of the product automaton gives the shortest
+distinguishing sequence.
+
+    python equivalence.py dfa main
+"""
+import argparse
+import sys
+from collections import deque
+
+from compiled import CompiledMachine, DEFAULT_MAX_CREDIT
+from dfa import (INSERTED, DISPENSED, INSUFFICIENT_FUNDS, CANCELLED, NOTHING_TO_REFUND,
+                 INVALID_INPUT, CREDIT_LIMIT, NO_CHANGE)
+from engine import VendingError, DRINK_TYPES, DRINK_PRICE, VALID_DENOMINATIONS, FULL_STOCK
+from explore import EngineModel
+
+# Only the trial engine runs out of drinks
+SOLD_OUT = 8
+
+STATUS_NAMES = {
+    INSERTED: "inserted",
+    DISPENSED: "dispensed",
+    INSUFFICIENT_FUNDS: "insufficient funds",
+    CANCELLED: "cancelled",
+    NOTHING_TO_REFUND: "nothing to refund",
+    INVALID_INPUT: "invalid input",
+    CREDIT_LIMIT: "credit limit",
+    NO_CHANGE: "no change",
+    SOLD_OUT: "sold out",
+}
+
+
+class TableAutomaton:
+    """A CompiledMachine seen as (state, input) -> (output, next state)."""
+
+    def __init__(self, machine):
+        self.machine = machine
+        self.alphabet = machine.alphabet
+        self.start = 0
+
+    def step(self, state, index):
+        k = state * self.machine.n_inputs + index
+        return self.machine.status[k], self.machine.next_state[k]
+
+    def state_name(self, state):
+        return self.machine.state_name(state)
+
+
+class EngineAutomaton:
+    """The trial engine over the dfa alphabet; 'dispense' buys the first drink in stock."""
+
+    def __init__(self, max_credit=DEFAULT_MAX_CREDIT, stock=FULL_STOCK):
+        self.model = EngineModel(len(DRINK_TYPES), stock, max_credit,
+                                 VALID_DENOMINATIONS)
+        self.alphabet = list(VALID_DENOMINATIONS) + ["dispense", "cancel"]
+        self.start = self.model.initial()
+
+    def step(self, state, index):
+        model = self.model
+        model.load(state)
+        machine = model.machine
+        symbol = self.alphabet[index]
+
+        if symbol == "cancel":
+            try:
+                machine.cancel_transaction()
+            except VendingError:
+                return NOTHING_TO_REFUND, state
+            return CANCELLED, model.read()
+
+        if symbol == "dispense":
+            drink = next((d for d in machine.drink_types if machine.available(d) > 0), None)
+            if drink is None:
+                return SOLD_OUT, state
+            try:
+                machine.select_drink(drink)
+                machine.purchase()
+            except VendingError:
+                return INSUFFICIENT_FUNDS, state
+            return DISPENSED, model.read()
+
+        if machine.current_amount + symbol > model.max_credit:
+            return CREDIT_LIMIT, state
+        machine.insert_money(symbol)
+        return INSERTED, model.read()
+
+    def state_name(self, state):
+        return self.model.name(state)
+
+
+def build(name, max_credit=DEFAULT_MAX_CREDIT, stock=FULL_STOCK):
+    if name == "dfa":
+        return TableAutomaton(CompiledMachine(VALID_DENOMINATIONS, DRINK_PRICE, max_credit))
+    if name == "main":
+        return TableAutomaton(CompiledMachine(VALID_DENOMINATIONS, DRINK_PRICE, max_credit,
+                                              keep_change=False))
+    if name == "trial":
+        return EngineAutomaton(max_credit, stock)
+    raise ValueError(f"Unknown model: {name}")
+
+
+MODELS = ("dfa", "main", "trial")
+
+
+def equivalent(a, b):
+    """Hopcroft-Karp: True if a and b give the same outputs for every input sequence."""
+    if list(a.alphabet) != list(b.alphabet):
+        raise ValueError("Models have different input alphabets")
+
+    # Union-find over the states of both machines, tagged by side
+    parent = {}
+
+    def find(x):
+        root = x
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while x != root:
+            parent[x], x = root, parent.get(x, x)
+        return root
+
+    n_inputs = len(a.alphabet)
+    parent[(1, b.start)] = (0, a.start)
+    pending = [(a.start, b.start)]
+    while pending:
+        p, q = pending.pop()
+        for i in range(n_inputs):
+            out_p, next_p = a.step(p, i)
+            out_q, next_q = b.step(q, i)
+            if out_p != out_q:
+                return False
+            root_p, root_q = find((0, next_p)), find((1, next_q))
+            if root_p != root_q:
+                parent[root_q] = root_p
+                pending.append((next_p, next_q))
+    return True
+
+
+def distinguishing_sequence(a, b):
+    """Shortest input index sequence on which a and b give different outputs, or None."""
+    n_inputs = len(a.alphabet)
+    start = (a.start, b.start)
+    came_from = {start: None}
+    queue = deque([start])
+    while queue:
+        pair = queue.popleft()
+        p, q = pair
+        for i in range(n_inputs):
+            out_p, next_p = a.step(p, i)
+            out_q, next_q = b.step(q, i)
+            if out_p != out_q:
+                sequence = [i]
+                while came_from[pair] is not None:
+                    pair, j = came_from[pair]
+                    sequence.append(j)
+                sequence.reverse()
+                return sequence
+            target = (next_p, next_q)
+            if target not in came_from:
+                came_from[target] = (pair, i)
+                queue.append(target)
+    return None
+
+
+def compare(a, b):
+    """None when equivalent, else the shortest distinguishing input sequence."""
+    if equivalent(a, b):
+        return None
+    return distinguishing_sequence(a, b)
+
+
+def trace(automaton, sequence):
+    """(symbol, output, state name after the step) for each input."""
+    state = automaton.start
+    steps = []
+    for i in sequence:
+        output, state = automaton.step(state, i)
+        steps.append((automaton.alphabet[i], STATUS_NAMES[output], automaton.state_name(state)))
+    return steps
+
+
+def format_difference(name_a, a, name_b, b, sequence):
+    symbols = " ".join(str(a.alphabet[i]) for i in sequence)
+    lines = [f"{name_a} and {name_b} differ after {len(sequence)} inputs: {symbols}"]
+    for name, automaton in ((name_a, a), (name_b, b)):
+        lines.append(f"  {name}:")
+        lines += [f"    {symbol:>8} -> {output:<18} {state}"
+                  for symbol, output, state in trace(automaton, sequence)]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check two vending machine models for equivalence.")
+    parser.add_argument("first", choices=MODELS)
+    parser.add_argument("second", choices=MODELS)
+    parser.add_argument("--max-credit", type=int, default=DEFAULT_MAX_CREDIT)
+    parser.add_argument("--stock", type=int, default=FULL_STOCK, help="trial: stock per drink")
+    args = parser.parse_args(argv)
+
+    a = build(args.first, args.max_credit, args.stock)
+    b = build(args.second, args.max_credit, args.stock)
+    sequence = compare(a, b)
+    if sequence is None:
+        print(f"{args.first} and {args.second} are equivalent")
+        return 0
+    print(format_difference(args.first, a, args.second, b, sequence))
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
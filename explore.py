@@ -0,0 +1,282 @@
+"""Breadth-first explorer of every reachable machine configuration.
+
+Two models are explored:
+
+    dfa    the credit automaton of dfa.py, via its compiled transition table
+    trial  the trial.py product engine: credit x machine state x stock
+           vector x selected drinks, driven through engine.DrinkMachine
+
+Configurations are packed into single integers with a mixed radix, so the
+visited set is a bitset over the packed index space when that fits in
+BITSET_LIMIT bits and a set of ints otherwise, and edges are kept as flat
+int64 arrays rather than tuples. The graph can be written as DOT or JSON.
+
+    python explore.py --model trial --drinks 2 --stock 2 --max-credit 100 --format dot
+"""
+import argparse
+import json
+import sys
+from array import array
+from collections import deque
+from functools import reduce
+from math import gcd
+
+from compiled import CompiledMachine, DEFAULT_MAX_CREDIT
+from dfa import CREDIT_LIMIT
+from engine import DrinkMachine, VendingError, STATES, DRINK_TYPES, DRINK_PRICE, VALID_DENOMINATIONS
+
+BITSET_LIMIT = 1 << 28
+
+
+class Bitset:
+    """Fixed-size set of small non-negative ints, one bit each."""
+
+    def __init__(self, size):
+        self.bits = bytearray((size + 7) // 8)
+        self.count = 0
+
+    def add(self, n):
+        if n not in self:
+            self.bits[n >> 3] |= 1 << (n & 7)
+            self.count += 1
+
+    def __contains__(self, n):
+        return self.bits[n >> 3] >> (n & 7) & 1
+
+    def __len__(self):
+        return self.count
+
+
+def visited_set(space):
+    return Bitset(space) if space <= BITSET_LIMIT else set()
+
+
+class CreditModel:
+    """dfa.py: the configuration is the credit, as a compiled state id."""
+
+    def __init__(self, machine=None, max_credit=DEFAULT_MAX_CREDIT):
+        if machine is None:
+            machine = CompiledMachine(VALID_DENOMINATIONS, DRINK_PRICE, max_credit)
+        self.machine = machine
+        self.labels = [str(symbol) for symbol in machine.alphabet]
+        self.space = machine.n_states
+
+    def initial(self):
+        return 0
+
+    def successors(self, state):
+        m = self.machine
+        row = state * m.n_inputs
+        for i in range(m.n_inputs):
+            if m.status[row + i] != CREDIT_LIMIT:
+                yield i, m.next_state[row + i]
+
+    def name(self, state):
+        return self.machine.state_name(state)
+
+    def describe(self, state):
+        return {"credit": self.machine.amount(state)}
+
+
+class EngineModel:
+    """trial.py: credit x state x stock vector x selection counts.
+
+    Inputs are every denomination, selecting each drink, purchase and cancel
+    (plus refill when enabled). Inserts that would push the credit over
+    max_credit are not explored.
+    """
+
+    def __init__(self, drinks=2, stock=2, max_credit=200, denominations=None, refill=False):
+        self.machine = DrinkMachine(DRINK_TYPES[:drinks], initial_stock=stock, history_capacity=1)
+        self.drinks = self.machine.drink_types
+        self.stock_level = stock
+        self.denominations = [d for d in (denominations or VALID_DENOMINATIONS) if d <= max_credit]
+        self.step = reduce(gcd, self.denominations, self.machine.drink_price)
+        self.max_credit = max_credit - max_credit % self.step
+
+        self.inputs = [("insert_money", d) for d in self.denominations]
+        self.inputs += [("select_drink", drink) for drink in self.drinks]
+        self.inputs += [("purchase",), ("cancel_transaction",)]
+        if refill:
+            self.inputs.append(("refill_all", stock))
+        self.labels = [" ".join(str(part) for part in i).replace("_", " ") for i in self.inputs]
+
+        # Mixed radix: credit, state, then stock and selection count per drink
+        self.radixes = ([self.max_credit // self.step + 1, len(STATES)]
+                        + [stock + 1] * (2 * len(self.drinks)))
+        self.space = 1
+        for radix in self.radixes:
+            self.space *= radix
+        self.per_credit = self.space // self.radixes[0]
+
+    def pack(self, digits):
+        n = 0
+        for digit, radix in zip(digits, self.radixes):
+            n = n * radix + digit
+        return n
+
+    def unpack(self, n):
+        digits = []
+        for radix in reversed(self.radixes):
+            n, digit = divmod(n, radix)
+            digits.append(digit)
+        digits.reverse()
+        return digits
+
+    def initial(self):
+        self.machine = DrinkMachine(self.drinks, initial_stock=self.stock_level, history_capacity=1)
+        return self.read()
+
+    def load(self, n):
+        digits = self.unpack(n)
+        m = self.machine
+        k = len(self.drinks)
+        m.current_amount = digits[0] * self.step
+        m.current_state = STATES[digits[1]]
+        m.stock = dict(zip(self.drinks, digits[2:2 + k]))
+        m.selected_drinks = [drink for drink, count in zip(self.drinks, digits[2 + k:])
+                             for _ in range(count)]
+        m.pending_purchase = None
+
+    def read(self):
+        m = self.machine
+        counts = m.selection_counts()
+        digits = [m.current_amount // self.step, STATES.index(m.current_state)]
+        digits += [m.stock[drink] for drink in self.drinks]
+        digits += [counts.get(drink, 0) for drink in self.drinks]
+        return self.pack(digits)
+
+    def successors(self, n):
+        credit = n // self.per_credit * self.step
+        for i, (method, *args) in enumerate(self.inputs):
+            if method == "insert_money" and credit + args[0] > self.max_credit:
+                continue
+            self.load(n)
+            try:
+                getattr(self.machine, method)(*args)
+            except VendingError:
+                continue
+            yield i, self.read()
+
+    def describe(self, n):
+        digits = self.unpack(n)
+        k = len(self.drinks)
+        return {
+            "credit": digits[0] * self.step,
+            "state": STATES[digits[1]],
+            "stock": dict(zip(self.drinks, digits[2:2 + k])),
+            "selected": {d: c for d, c in zip(self.drinks, digits[2 + k:]) if c},
+        }
+
+    def name(self, n):
+        info = self.describe(n)
+        stock = "/".join(str(c) for c in info["stock"].values())
+        selected = ",".join(f"{d}x{c}" for d, c in info["selected"].items())
+        return f"{info['state']} {info['credit']} [{stock}]" + (f" {{{selected}}}" if selected else "")
+
+
+class StateGraph:
+    """Reachable configurations (packed ints, BFS order) and labelled edges."""
+
+    def __init__(self, model):
+        self.model = model
+        self.nodes = array("q")
+        self.edges = array("q")  # flat (source, input index, target) triples
+        self.truncated = False
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def iter_edges(self):
+        edges = self.edges
+        for i in range(0, len(edges), 3):
+            yield edges[i], edges[i + 1], edges[i + 2]
+
+
+def explore(model, limit=None):
+    """Breadth-first search from the initial configuration; stops after limit nodes."""
+    graph = StateGraph(model)
+    visited = visited_set(model.space)
+    start = model.initial()
+    visited.add(start)
+    graph.nodes.append(start)
+    queue = deque([start])
+
+    while queue:
+        node = queue.popleft()
+        for label, target in model.successors(node):
+            if target not in visited:
+                if limit is not None and len(graph.nodes) >= limit:
+                    graph.truncated = True
+                    continue
+                visited.add(target)
+                graph.nodes.append(target)
+                queue.append(target)
+            graph.edges.extend((node, label, target))
+    return graph
+
+
+def write_dot(graph, out):
+    model = graph.model
+    out.write("digraph machine {\n    rankdir=LR;\n    node [shape=circle];\n")
+    start = graph.nodes[0] if graph.nodes else None
+    for node in graph.nodes:
+        shape = ' shape=doublecircle' if node == start else ''
+        out.write(f'    n{node} [label="{model.name(node)}"{shape}];\n')
+    for source, label, target in graph.iter_edges():
+        out.write(f'    n{source} -> n{target} [label="{model.labels[label]}"];\n')
+    out.write("}\n")
+
+
+def write_json(graph, out):
+    model = graph.model
+    out.write('{"inputs": ' + json.dumps(model.labels))
+    out.write(', "truncated": ' + json.dumps(graph.truncated))
+    out.write(', "nodes": [')
+    for i, node in enumerate(graph.nodes):
+        out.write(("," if i else "") + json.dumps({"id": node, "name": model.name(node),
+                                                   **model.describe(node)}))
+    out.write('], "edges": [')
+    for i, (source, label, target) in enumerate(graph.iter_edges()):
+        out.write(("," if i else "") + json.dumps([source, label, target]))
+    out.write("]}\n")
+
+
+WRITERS = {"dot": write_dot, "json": write_json}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Explore reachable vending machine configurations.")
+    parser.add_argument("--model", choices=["dfa", "trial"], default="dfa")
+    parser.add_argument("--max-credit", type=int, help="credit bound (dfa default 2000, trial 200)")
+    parser.add_argument("--drinks", type=int, default=2, help="trial: number of drink types")
+    parser.add_argument("--stock", type=int, default=2, help="trial: starting stock per drink")
+    parser.add_argument("--denominations", type=int, nargs="*", help="trial: denominations to insert")
+    parser.add_argument("--refill", action="store_true", help="trial: include the admin refill")
+    parser.add_argument("--limit", type=int, help="stop after this many configurations")
+    parser.add_argument("--format", choices=sorted(WRITERS), help="write the graph in this format")
+    parser.add_argument("--output", help="write the graph here instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.model == "dfa":
+        model = CreditModel(max_credit=args.max_credit or DEFAULT_MAX_CREDIT)
+    else:
+        model = EngineModel(args.drinks, args.stock, args.max_credit or 200,
+                            args.denominations, args.refill)
+
+    graph = explore(model, args.limit)
+    summary = (f"{len(graph)} reachable configurations, {len(graph.edges) // 3} transitions"
+               f" (index space {model.space})" + (" - truncated" if graph.truncated else ""))
+
+    if args.format:
+        if args.output:
+            with open(args.output, "w") as out:
+                WRITERS[args.format](graph, out)
+        else:
+            WRITERS[args.format](graph, sys.stdout)
+    print(summary, file=sys.stderr if args.format and not args.output else sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
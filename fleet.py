@@ -0,0 +1,66 @@
+"""Simulate a fleet of vending machines across several processes.
+
+Each machine id maps to its own event stream: either a path to a CSV/JSONL
+log (read inside the worker) or a list of (event, amount) pairs. Machines are
+sharded across a ProcessPoolExecutor by a stable hash of their id, every
+worker replays its machines independently, and the per-machine results are
+merged with fleet-wide totals at the end.
+"""
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from dfa import VendingMachineSimulation
+from replay import replay, read_events
+
+
+def shard_of(machine_id, n_shards):
+    """Stable shard number for a machine id (independent of PYTHONHASHSEED)."""
+    return zlib.crc32(str(machine_id).encode()) % n_shards
+
+
+def run_shard(streams):
+    """Replay every machine in one shard and return {machine_id: stats}."""
+    results = {}
+    for machine_id, events in streams:
+        if isinstance(events, str):
+            events = read_events(events)
+        results[machine_id] = replay(events, VendingMachineSimulation())
+    return results
+
+
+def merge_totals(results):
+    """Sum the numeric counters of all machines."""
+    totals = {}
+    for stats in results.values():
+        for key, value in stats.items():
+            if isinstance(value, int):
+                totals[key] = totals.get(key, 0) + value
+    totals["machines"] = len(results)
+    return totals
+
+
+def run_fleet(streams, workers=None):
+    """Replay a fleet of machines in parallel.
+
+    streams -- dict mapping machine id to a log path or list of events
+    workers -- number of processes (defaults to the CPU count)
+
+    Returns (per_machine_results, fleet_totals).
+    """
+    workers = workers or os.cpu_count() or 1
+    n_shards = min(workers, len(streams)) or 1
+
+    shards = [[] for _ in range(n_shards)]
+    for machine_id, events in streams.items():
+        shards[shard_of(machine_id, n_shards)].append((machine_id, events))
+
+    results = {}
+    if n_shards == 1:
+        results.update(run_shard(shards[0]))
+    else:
+        with ProcessPoolExecutor(max_workers=n_shards) as pool:
+            for shard_results in pool.map(run_shard, shards):
+                results.update(shard_results)
+
+    return results, merge_totals(results)
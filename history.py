@@ -0,0 +1,77 @@
+"""Bounded, structured transaction history.
+
+Entries are stored as compact (kind, amount, change, time) tuples in a ring
+buffer with O(1) append and eviction. Text is only rendered when history is
+shown.
+"""
+import time
+from collections import deque
+from itertools import islice
+
+INSERT = "insert"
+DISPENSE = "dispense"
+CANCEL = "cancel"
+
+DEFAULT_CAPACITY = 100
+
+
+def render_insert(amount, change):
+    return f"Inserted {amount} KShs"
+
+
+def render_dispense(amount, change):
+    if change > 0:
+        return f"Drink dispensed. Change: {change} KShs"
+    return "Drink dispensed. No change."
+
+
+def render_cancel(amount, change):
+    return f"Transaction cancelled. Refunded {amount} KShs"
+
+
+RENDERERS = {
+    INSERT: render_insert,
+    DISPENSE: render_dispense,
+    CANCEL: render_cancel,
+}
+
+
+class TransactionHistory:
+    def __init__(self, capacity=DEFAULT_CAPACITY, renderers=None):
+        self.capacity = capacity
+        self.entries = deque(maxlen=capacity)
+        # Entries ever appended, so a view can tell which ones are new
+        self.appended = 0
+        self.renderers = dict(RENDERERS)
+        if renderers:
+            self.renderers.update(renderers)
+
+    def append(self, kind, amount=0, change=0, timestamp=None):
+        """Record an event; the oldest entry is dropped once capacity is reached."""
+        if timestamp is None:
+            timestamp = time.time()
+        self.entries.append((kind, amount, change, timestamp))
+        self.appended += 1
+
+    def render(self, entry):
+        """Turn a stored entry into its display text."""
+        kind, amount, change = entry[:3]
+        return self.renderers[kind](amount, change)
+
+    def recent(self, n):
+        """Rendered text of the last n entries, oldest first."""
+        start = max(len(self.entries) - n, 0)
+        return [self.render(entry) for entry in islice(self.entries, start, None)]
+
+    def records(self):
+        """Structured entries, oldest first."""
+        return list(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return (self.render(entry) for entry in self.entries)
@@ -0,0 +1,96 @@
+"""Capped, lazily loaded transaction-history view for a Tk Text widget.
+
+The view renders straight from a history.TransactionHistory; it keeps no
+copy of the entries. Each line starts with the entry's [HH:MM:SS] time. After appending to the history, call refresh(): new
+entries are written in one batch per idle cycle, newest at the top, and the
+widget is trimmed to a bounded number of lines. Older entries are rendered
+from the history again, a page at a time, when the user scrolls to the
+bottom of the widget.
+"""
+import time
+
+VISIBLE_LINES = 100
+PAGE_SIZE = 50
+
+# History capacity for GUIs, so there is more to page back in than is shown
+HISTORY_CAPACITY = 1000
+
+
+class HistoryView:
+    def __init__(self, text, scrollbar, history, max_lines=VISIBLE_LINES, page_size=PAGE_SIZE):
+        self.text = text
+        self.scrollbar = scrollbar
+        self.history = history
+        self.max_lines = max_lines
+        self.page_size = page_size
+        self.seen = 0
+        self.shown = 0
+        self.flush_scheduled = False
+
+        self.text.config(yscrollcommand=self.on_scroll)
+        # Show whatever the history already holds, e.g. after recovery
+        self.refresh()
+
+    def refresh(self):
+        """Queue the entries appended to the history since the last flush."""
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            self.text.after_idle(self.flush)
+
+    def pending(self):
+        """Entries in the history that have not been written yet."""
+        return min(self.history.appended - self.seen, len(self.history))
+
+    def line(self, index):
+        return self.format(self.history.entries[index])
+
+    def format(self, entry):
+        return f"[{time.strftime('%H:%M:%S', time.localtime(entry[3]))}] {self.history.render(entry)}\n"
+
+    def flush(self):
+        """Write all pending entries at the top and trim to max_lines."""
+        self.flush_scheduled = False
+        new = self.pending()
+        self.seen = self.history.appended
+        if not new:
+            return
+
+        newest = len(self.history) - 1
+        block = "".join(self.line(i) for i in range(newest, newest - new, -1))
+        self.shown += new
+
+        self.text.config(state="normal")
+        self.text.insert("1.0", block)
+        if self.shown > self.max_lines:
+            self.text.delete(f"{self.max_lines + 1}.0", "end")
+            self.shown = self.max_lines
+        self.text.config(state="disabled")
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if float(last) >= 1.0 and self.shown < len(self.history) - self.pending():
+            self.load_older()
+
+    def load_older(self):
+        """Append the next page of older entries from the history."""
+        start = len(self.history) - self.pending() - self.shown
+        older = [self.line(i) for i in range(start - 1, max(start - 1 - self.page_size, -1), -1)]
+        if not older:
+            return
+
+        self.shown += len(older)
+        self.text.config(state="normal")
+        self.text.insert("end", "".join(older))
+        self.text.config(state="disabled")
+
+    def entries(self):
+        """All entries in the history, rendered, newest first."""
+        return [self.format(entry) for entry in reversed(self.history.records())]
+
+    def clear(self):
+        """Empty the widget; call after clearing the history itself."""
+        self.seen = self.history.appended
+        self.shown = 0
+        self.text.config(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.config(state="disabled")
@@ -0,0 +1,188 @@
+"""Opt-in instrumentation for the vending machine classes.
+
+Nothing is measured until enable() is called: it swaps the public methods of
+the given classes for timing wrappers, so a disabled build runs the original
+methods untouched. While enabled it records
+
+  - a latency histogram (power-of-two nanosecond buckets) per public method
+  - a count of transitions by (from-state, input, to-state), taken at the
+    innermost transition method, so insert_money is counted through
+    insert_status and each step of run_batch or DrinkMachine.purchase counts
+
+and prints a report at interpreter exit. Set VM_INSTRUMENT=1 to turn it on for
+the command line and GUI entry points (VM_INSTRUMENT_FILE redirects the report).
+"""
+import atexit
+import functools
+import os
+import sys
+import time
+import types
+from collections import Counter
+
+# Methods whose calls are state transitions, with the input they represent
+TRANSITION_INPUTS = {
+    "insert_money": lambda args: str(args[0]) if args else "insert",
+    "insert_status": lambda args: str(args[0]) if args else "insert",
+    "dispense_drink": lambda args: "dispense",
+    "dispense_drinks": lambda args: "dispense",
+    "dispense_status": lambda args: "dispense",
+    "begin_purchase": lambda args: "dispense",
+    "complete_purchase": lambda args: "complete",
+    "cancel_transaction": lambda args: "cancel",
+    "cancel_status": lambda args: "cancel",
+    "select_drink": lambda args: f"select {args[0]}" if args else "select",
+}
+
+
+class Histogram:
+    """Latency histogram with power-of-two nanosecond buckets."""
+
+    def __init__(self):
+        self.buckets = [0] * 64
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns):
+        self.buckets[ns.bit_length()] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of samples."""
+        rank = fraction * self.count
+        seen = 0
+        for bits, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return min((1 << bits) - 1, self.max)
+        return 0
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+
+histograms = {}
+transitions = Counter()
+# Class name -> StateTable naming the integer state ids recorded for it
+state_tables = {}
+_originals = {}
+_report_registered = False
+# [object, inner transition counted] for each transition call in progress
+_active = []
+
+
+def _state_of(obj, owner):
+    """The object's state id when it has a StateTable, else its current_state."""
+    table = getattr(obj, "state_table", None)
+    if table is None:
+        return getattr(obj, "current_state", None)
+    state_tables[owner] = table
+    return obj.state
+
+
+def _wrap(cls, name, method):
+    label = f"{cls.__name__}.{name}"
+    histogram = histograms.setdefault(label, Histogram())
+    transition_input = TRANSITION_INPUTS.get(name)
+    clock = time.perf_counter_ns
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        before = _state_of(self, cls.__name__)
+        if transition_input is not None:
+            frame = [self, False]
+            _active.append(frame)
+        start = clock()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            histogram.record(clock() - start)
+            if transition_input is not None:
+                _active.pop()
+                # Counted already by a transition method it called on the same object
+                if not frame[1]:
+                    after = _state_of(self, cls.__name__)
+                    transitions[(cls.__name__, before, transition_input(args), after)] += 1
+                if _active and _active[-1][0] is self:
+                    _active[-1][1] = True
+
+    return wrapper
+
+
+def enable(*classes, report_at_exit=True):
+    """Instrument every public method defined on the given classes."""
+    global _report_registered
+
+    for cls in classes:
+        if cls in _originals:
+            continue
+        originals = {}
+        for name, method in vars(cls).items():
+            if name.startswith("_") or not isinstance(method, types.FunctionType):
+                continue
+            originals[name] = method
+            setattr(cls, name, _wrap(cls, name, method))
+        _originals[cls] = originals
+
+    if report_at_exit and not _report_registered:
+        atexit.register(dump_report)
+        _report_registered = True
+
+
+def disable(*classes):
+    """Restore the original methods (all instrumented classes by default)."""
+    for cls in classes or list(_originals):
+        for name, method in _originals.pop(cls, {}).items():
+            setattr(cls, name, method)
+
+
+def enabled_from_env():
+    return os.environ.get("VM_INSTRUMENT", "") not in ("", "0")
+
+
+def enable_from_env(*classes):
+    """Enable instrumentation for the given classes if VM_INSTRUMENT is set."""
+    if enabled_from_env():
+        enable(*classes)
+
+
+def reset():
+    for histogram in histograms.values():
+        histogram.__init__()
+    transitions.clear()
+
+
+def format_report(top=20):
+    lines = ["=== Instrumentation Report ===",
+             f"{'method':<44} {'calls':>8} {'mean us':>9} {'p50 us':>8} {'p99 us':>8} {'max us':>8}"]
+    for label, h in sorted(histograms.items(), key=lambda item: -item[1].total):
+        if not h.count:
+            continue
+        lines.append(f"{label:<44} {h.count:>8} {h.mean() / 1000:>9.1f} "
+                     f"{h.percentile(0.5) / 1000:>8.1f} {h.percentile(0.99) / 1000:>8.1f} "
+                     f"{h.max / 1000:>8.1f}")
+
+    lines.append("")
+    lines.append(f"Top transitions ({len(transitions)} distinct):")
+    for (owner, before, symbol, after), n in transitions.most_common(top):
+        table = state_tables.get(owner)
+        if table is not None:
+            before, after = table.name(before), table.name(after)
+        lines.append(f"{n:>8}  {owner}: {before} --({symbol})--> {after}")
+    return "\n".join(lines)
+
+
+def dump_report():
+    """Write the report to VM_INSTRUMENT_FILE, or stderr if it is not set."""
+    if not any(h.count for h in histograms.values()):
+        return
+    path = os.environ.get("VM_INSTRUMENT_FILE")
+    if path:
+        with open(path, "w") as f:
+            f.write(format_report() + "\n")
+    else:
+        print(format_report(), file=sys.stderr)
@@ -0,0 +1,139 @@
+"""On-the-fly determinization with a bounded LRU cache of DFA states.
+
+LazyDFA runs an automaton.NFA as if it had been determinized, but only
+builds the DFA states that inputs actually reach. A DFA state is the NFA
+subset bitmask itself. Each cached state keeps its row of successors,
+which fills in as symbols are seen, so a hot path costs a dict lookup and
+a list index. The cache holds at most capacity states. A miss, including
+a state that was evicted, is answered by NFA simulation, and the state is
+cached again. A hit is a step() whose successor was already cached; a
+miss is one that had to run the NFA. labels() reads the cache without
+adding to it or reordering it, so it never affects the counts.
+
+It has the same start/step/labels interface as automaton.DFA, so
+automaton.AutomatonMachine and dfa.run_simulation drive it unchanged:
+
+    python lazydfa.py --capacity 64 soda=50 juice=70 water=30
+"""
+import argparse
+import sys
+from collections import OrderedDict
+
+from automaton import AutomatonMachine, DEAD, bits, vending_nfa
+
+DEFAULT_CAPACITY = 1024
+
+
+class LazyDFA:
+    def __init__(self, nfa, capacity=DEFAULT_CAPACITY):
+        self.nfa = nfa
+        self.alphabet = nfa.alphabet
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.alphabet)}
+        self.capacity = capacity
+        self.cache = OrderedDict()  # subset mask -> [labels, successor masks]
+        self.start = nfa.start_set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.cache)
+
+    def entry(self, mask):
+        """Cached entry for mask, marked most recently used; created if absent."""
+        entry = self.cache.get(mask)
+        if entry is not None:
+            self.cache.move_to_end(mask)
+            return entry
+
+        entry = self.cache[mask] = [None, [None] * len(self.alphabet)]
+        if len(self.cache) > self.capacity:
+            self.cache.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def step(self, mask, symbol):
+        index = self.symbol_index.get(symbol)
+        if index is None or mask == DEAD:
+            return DEAD
+        successors = self.entry(mask)[1]
+        target = successors[index]
+        if target is None:
+            self.misses += 1
+            target = successors[index] = self.nfa.step(mask, symbol)
+        else:
+            self.hits += 1
+        return target if target else DEAD
+
+    def run(self, inputs, mask=None):
+        mask = self.start if mask is None else mask
+        for symbol in inputs:
+            mask = self.step(mask, symbol)
+            if mask == DEAD:
+                break
+        return mask
+
+    def accepts(self, inputs):
+        mask = self.run(inputs)
+        return mask != DEAD and bool(mask & self.nfa.accepting)
+
+    def labels(self, mask):
+        if mask == DEAD:
+            return []
+        # Peek only: display reads must not change what is cached or in what order
+        entry = self.cache.get(mask)
+        if entry is None:
+            return self.nfa.subset_labels(mask)
+        if entry[0] is None:
+            entry[0] = self.nfa.subset_labels(mask)
+        return entry[0]
+
+    def state_name(self, mask):
+        if mask == DEAD:
+            return "{}"
+        return "{" + ",".join(self.nfa.names[s] for s in bits(mask)) + "}"
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "cached": len(self.cache),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"Lazy DFA cache: {s['cached']}/{s['capacity']} states, {s['hits']} hits, "
+                f"{s['misses']} misses, {s['evictions']} evictions ({s['hit_rate']:.1%} hit rate)")
+
+
+def parse_prices(items):
+    prices = {}
+    for item in items:
+        name, _, price = item.partition("=")
+        prices[name] = int(price)
+    return prices
+
+
+def main(argv=None):
+    from dfa import run_simulation
+
+    parser = argparse.ArgumentParser(description="Run a multi-product machine on a lazy DFA.")
+    parser.add_argument("products", nargs="*", default=["soda=50"], help="name=price pairs")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY,
+                        help="DFA states kept in the cache")
+    parser.add_argument("--max-credit", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    prices = parse_prices(args.products)
+    automaton = LazyDFA(vending_nfa(prices, max_credit=args.max_credit), args.capacity)
+    run_simulation(machine=AutomatonMachine(automaton, prices))
+    print(automaton.format_stats())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,46 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import time
+from collections import deque
+
+from diagram import RetainedDiagram, STATE_STYLE
+from history import TransactionHistory, INSERT, DISPENSE, CANCEL
+from historyview import HistoryView, HISTORY_CAPACITY
+from instrument import enable_from_env
+from states import CREDIT_STATES
+
+# Time spent in the dispensing step; 0 completes it synchronously (for tests)
+DISPENSE_DELAY_MS = 1000
+
+# States are interned ids from the shared credit state table
+q = CREDIT_STATES.id_of
+
+# States shown on the diagram (simplified for visualization) and their positions
+VISIBLE_STATES = [q(0), q(10), q(20), q(30), q(40), q(50), q(100)]
+STATE_POSITIONS = {
+    q(0): (100, 100),
+    q(10): (200, 50),
+    q(20): (300, 50),
+    q(30): (400, 50),
+    q(40): (500, 50),
+    q(50): (200, 150),
+    q(100): (300, 150)
+}
+EXTRA_STATE_POSITION = (400, 150)
+TRANSITIONS = [
+    (q(0), q(10), "10"),
+    (q(0), q(20), "20"),
+    (q(0), q(50), "50"),
+    (q(10), q(20), "10"),
+    (q(20), q(30), "10"),
+    (q(30), q(40), "10"),
+    (q(40), q(50), "10"),
+    (q(50), q(0), "dispense"),
+    (q(50), q(100), "50"),
+    (q(100), q(50), "dispense"),
+]
 
 class VendingMachineGUI:
-    def __init__(self, root):
+    def __init__(self, root, dispense_delay=DISPENSE_DELAY_MS, show_dialogs=True):
         self.root = root
         self.root.title("JKUAT Soft Drink Vending Machine")
         self.root.geometry("800x600")
@@ -13,9 +50,16 @@ class VendingMachineGUI:
         self.current_amount = 0
         self.drink_price = 50
         self.valid_denominations = [10, 20, 40, 50, 100, 200, 500, 1000]
-        self.transaction_history = []
+        self.transaction_history = TransactionHistory(HISTORY_CAPACITY)
         self.drinks_dispensed = 0
-        self.current_state = "q0"
+        self.state_table = CREDIT_STATES
+        self.state = 0
+        
+        # Dispensing runs on Tk timers; inputs arriving meanwhile are queued in order
+        self.dispense_delay = dispense_delay
+        self.show_dialogs = show_dialogs
+        self.dispensing = False
+        self.pending_inputs = deque()
         
         # Create the main frames
         self.create_frames()
@@ -30,8 +74,14 @@ class VendingMachineGUI:
         
         # Initial state visualization
         self.update_state_display()
+        self.draw_diagram()
         self.update_diagram()
     
+    @property
+    def current_state(self):
+        """Display name of the current state."""
+        return self.state_table.name(self.state)
+    
     def create_frames(self):
         # Left frame for controls
         self.left_frame = tk.Frame(self.root, bg="#f0f0f0", width=400)
@@ -119,6 +169,9 @@ class VendingMachineGUI:
         
         # Make the text widget read-only
         self.history_text.config(state=tk.DISABLED)
+        
+        # Bounded view of the history that batches inserts and pages older entries back in
+        self.history_view = HistoryView(self.history_text, scrollbar, self.transaction_history)
     
     def create_diagram_view(self):
         diagram_frame = tk.LabelFrame(self.right_frame, text="State Diagram", 
@@ -130,52 +183,63 @@ class VendingMachineGUI:
         self.canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
     
     def insert_money(self, denomination):
+        if self.dispensing:
+            self.pending_inputs.append((self.insert_money, (denomination,)))
+            return
+        
         self.current_amount += denomination
-        self.current_state = f"q{self.current_amount}"
+        self.state = self.state_table.id_of(self.current_amount)
         
         # Update UI
         self.update_state_display()
         self.update_diagram()
-        self.add_history(f"Inserted {denomination} KShs")
+        self.add_history(INSERT, denomination)
         
         # Flash the status
         self.status_label.config(text=f"Inserted {denomination} KShs", fg="#008000")
         self.root.after(1500, lambda: self.status_label.config(text="Ready"))
     
     def dispense_drink(self):
+        if self.dispensing:
+            self.pending_inputs.append((self.dispense_drink, ()))
+            return
+        
         if self.current_amount < self.drink_price:
             needed = self.drink_price - self.current_amount
             self.status_label.config(text=f"Need {needed} more KShs", fg="#ff0000")
-            messagebox.showinfo("Insufficient Funds", f"Please insert {needed} more KShs")
+            self.notify("Insufficient Funds", f"Please insert {needed} more KShs")
             return
         
         # Dispense drink and calculate change
         self.drinks_dispensed += 1
         change = self.current_amount - self.drink_price
-        old_state = self.current_state
         
         # Update state
         self.current_amount = change
-        self.current_state = f"q{self.current_amount}"
+        self.state = self.state_table.id_of(change)
         
-        # Update UI with animation
+        # Update UI and simulate dispensing time without blocking the event loop
         self.status_label.config(text="Dispensing drink...", fg="#008000")
-        self.root.update()
-        time.sleep(1)  # Simulate dispensing time
-        
+        self.dispensing = True
+        if self.dispense_delay > 0:
+            self.root.after(self.dispense_delay, lambda: self.finish_dispense(change))
+        else:
+            self.finish_dispense(change)
+    
+    def finish_dispense(self, change):
         # Show change message
         if change > 0:
             self.status_label.config(text=f"Drink dispensed! Change: {change} KShs")
-            self.add_history(f"Drink dispensed. Change: {change} KShs")
-            messagebox.showinfo("Drink Dispensed", f"Enjoy your drink!\nChange: {change} KShs")
+            self.add_history(DISPENSE, self.drink_price, change)
+            self.notify("Drink Dispensed", f"Enjoy your drink!\nChange: {change} KShs")
         else:
             self.status_label.config(text="Drink dispensed! No change.")
-            self.add_history("Drink dispensed. No change.")
-            messagebox.showinfo("Drink Dispensed", "Enjoy your drink!")
+            self.add_history(DISPENSE, self.drink_price)
+            self.notify("Drink Dispensed", "Enjoy your drink!")
         
         # Refresh to initial state
         self.current_amount = 0
-        self.current_state = "q0"
+        self.state = 0
         
         # Update the state display and diagram
         self.update_state_display()
@@ -183,27 +247,36 @@ class VendingMachineGUI:
         
         # Reset status
         self.status_label.config(text="Ready", fg="#008000")
+        self.dispensing = False
+        
+        # Handle inputs that arrived while dispensing, in arrival order
+        while self.pending_inputs and not self.dispensing:
+            handler, args = self.pending_inputs.popleft()
+            handler(*args)
     
     def cancel_transaction(self):
+        if self.dispensing:
+            self.pending_inputs.append((self.cancel_transaction, ()))
+            return
+        
         if self.current_amount == 0:
             self.status_label.config(text="No money to return", fg="#ff0000")
             return
         
         refund = self.current_amount
-        old_state = self.current_state
         
         # Update state
         self.current_amount = 0
-        self.current_state = "q0"
+        self.state = 0
         
         # Update UI
         self.status_label.config(text=f"Returned {refund} KShs", fg="#ff0000")
-        self.add_history(f"Transaction cancelled. Refunded {refund} KShs")
-        messagebox.showinfo("Transaction Cancelled", f"Refunded {refund} KShs")
+        self.add_history(CANCEL, refund)
+        self.notify("Transaction Cancelled", f"Refunded {refund} KShs")
         
         # Refresh to initial state
         self.current_amount = 0
-        self.current_state = "q0"
+        self.state = 0
         
         # Update display and diagram
         self.update_state_display()
@@ -212,6 +285,10 @@ class VendingMachineGUI:
         # Reset status
         self.status_label.config(text="Ready", fg="#008000")
     
+    def notify(self, title, message):
+        if self.show_dialogs:
+            messagebox.showinfo(title, message)
+    
     def update_state_display(self):
         self.state_label.config(text=f"Current State: {self.current_state}")
         self.amount_label.config(text=f"Amount: {self.current_amount} KShs")
@@ -222,67 +299,35 @@ class VendingMachineGUI:
         else:
             self.dispense_button.config(state=tk.NORMAL, bg="#A0A0A0")
     
-    def update_diagram(self, highlight_transition=False, from_state=None):
-        # Clear canvas
+    def draw_diagram(self):
+        """Draw the static state diagram once and keep its canvas item ids."""
         self.canvas.delete("all")
-        
-        # Define states to show (simplified for visualization)
-        visible_states = ["q0", "q10", "q20", "q30", "q40", "q50", "q100"]
-        
-        # Add the current state if not in visible_states
-        if self.current_state not in visible_states and self.current_state != "q0":
-            visible_states.append(self.current_state)
-        
-        # Define state positions
-        state_positions = {
-            "q0": (100, 100),
-            "q10": (200, 50),
-            "q20": (300, 50),
-            "q30": (400, 50),
-            "q40": (500, 50),
-            "q50": (200, 150),
-            "q100": (300, 150)
-        }
-        
-        # Add position for current state if not defined
-        if self.current_state not in state_positions:
-            state_positions[self.current_state] = (400, 150)
+        self.diagram = RetainedDiagram(self.canvas, self.state_table.name)
         
         # Draw states
         radius = 30
-        for state in visible_states:
-            x, y = state_positions[state]
-            
-            # Highlight current state
-            fill_color = "#ffcc00" if state == self.current_state else "white"
-            outline_color = "red" if state == self.current_state else "black"
-            outline_width = 3 if state == self.current_state else 1
-            
-            self.canvas.create_oval(x-radius, y-radius, x+radius, y+radius, 
-                                   fill=fill_color, outline=outline_color, width=outline_width)
-            self.canvas.create_text(x, y, text=state)
+        for state in VISIBLE_STATES:
+            x, y = STATE_POSITIONS[state]
+            oval = self.canvas.create_oval(x-radius, y-radius, x+radius, y+radius, **STATE_STYLE)
+            self.canvas.create_text(x, y, text=self.state_table.name(state))
+            self.diagram.add_state(state, oval)
+        
+        # Slot for a current state that is not one of the visible states
+        x, y = EXTRA_STATE_POSITION
+        oval = self.canvas.create_oval(x-radius, y-radius, x+radius, y+radius,
+                                       state=tk.HIDDEN, **STATE_STYLE)
+        label = self.canvas.create_text(x, y, text="", state=tk.HIDDEN)
+        self.diagram.set_overflow(oval, label)
         
         # Draw some transitions
-        self.draw_transition("q0", "q10", "10", state_positions)
-        self.draw_transition("q0", "q20", "20", state_positions)
-        self.draw_transition("q0", "q50", "50", state_positions)
-        self.draw_transition("q10", "q20", "10", state_positions)
-        self.draw_transition("q20", "q30", "10", state_positions)
-        self.draw_transition("q30", "q40", "10", state_positions)
-        self.draw_transition("q40", "q50", "10", state_positions)
-        self.draw_transition("q50", "q0", "dispense", state_positions)
-        self.draw_transition("q50", "q100", "50", state_positions)
-        self.draw_transition("q100", "q50", "dispense", state_positions)
-        
-        # Highlight a specific transition if requested
-        if highlight_transition and from_state in state_positions:
-            # Find transition to highlight
-            if from_state == "q50" and self.current_state == "q0":
-                self.highlight_transition("q50", "q0", state_positions)
-            elif from_state == "q100" and self.current_state == "q50":
-                self.highlight_transition("q100", "q50", state_positions)
-            elif from_state == "q0" and self.current_state == "q50":
-                self.highlight_transition("q0", "q50", state_positions)
+        for from_state, to_state, label in TRANSITIONS:
+            self.draw_transition(from_state, to_state, label, STATE_POSITIONS)
+    
+    def update_diagram(self, highlight_transition=False, from_state=None):
+        # Only the previous/current state and the active transition are restyled
+        if not highlight_transition:
+            from_state = None
+        self.diagram.set_current(self.state, from_state)
     
     def draw_transition(self, from_state, to_state, label, positions):
         # Check if both states are in positions
@@ -293,35 +338,26 @@ class VendingMachineGUI:
         x2, y2 = positions[to_state]
         
         # Draw the arrow
-        self.canvas.create_line(x1, y1, x2, y2, arrow=tk.LAST)
+        line = self.canvas.create_line(x1, y1, x2, y2, arrow=tk.LAST)
+        self.diagram.add_transition(from_state, to_state, line)
         
         # Draw the label
         label_x = (x1 + x2) / 2
         label_y = (y1 + y2) / 2 - 10
         self.canvas.create_text(label_x, label_y, text=label)
     
-    def highlight_transition(self, from_state, to_state, positions):
-        x1, y1 = positions[from_state]
-        x2, y2 = positions[to_state]
-        
-        # Draw a highlighted arrow
-        self.canvas.create_line(x1, y1, x2, y2, arrow=tk.LAST, 
-                               fill="red", width=3)
+    def highlight_transition(self, from_state, to_state, positions=None):
+        # Highlight the retained arrow instead of drawing a new one
+        self.diagram.highlight((from_state, to_state))
     
-    def add_history(self, message):
-        timestamp = time.strftime("%H:%M:%S")
-        entry = f"[{timestamp}] {message}\n"
-        
-        # Enable text widget for editing
-        self.history_text.config(state=tk.NORMAL)
+    def add_history(self, kind, amount=0, change=0):
+        self.transaction_history.append(kind, amount, change)
         
-        # Insert at the beginning
-        self.history_text.insert("1.0", entry)
-        
-        # Disable text widget again
-        self.history_text.config(state=tk.DISABLED)
+        # Written at the top of the widget on the next idle cycle
+        self.history_view.refresh()
 
 def main():
+    enable_from_env(VendingMachineGUI)
     root = tk.Tk()
     app = VendingMachineGUI(root)
     root.mainloop()
@@ -0,0 +1,216 @@
+"""Hopcroft minimization of the explicit credit-state automaton.
+
+Two credit states are merged when no input sequence can tell them apart by
+the outcome codes it produces (inserted, dispensed, insufficient funds, ...).
+The refund amount itself is not observed, only whether a purchase happens.
+
+The credit cap only exists to make the model finite, so by default an insert
+refused at the cap is observed like an accepted one, as if credit saturated.
+That collapses the main.py model (change not kept) to 6 states. With the
+exact credit semantics of dfa.py every credit below the cap is a distinct
+counter value and nothing merges; pass strict_signature to observe the cap.
+"""
+from array import array
+from collections import deque
+
+from compiled import CompiledMachine, DEFAULT_MAX_CREDIT
+from dfa import INSERTED, CREDIT_LIMIT
+
+
+def reachable_states(n_inputs, next_state, start=0):
+    """Return the states reachable from start, in BFS order."""
+    seen = {start}
+    order = [start]
+    queue = deque(order)
+    while queue:
+        state = queue.popleft()
+        row = state * n_inputs
+        for i in range(n_inputs):
+            target = next_state[row + i]
+            if target not in seen:
+                seen.add(target)
+                order.append(target)
+                queue.append(target)
+    return order
+
+
+def hopcroft(states, n_inputs, next_state, signature):
+    """Partition states into equivalence classes in O(n log n) per input.
+
+    states      -- state ids to partition (closed under next_state)
+    next_state  -- flat table indexed by state * n_inputs + input
+    signature   -- function giving the observable output of a state
+
+    Returns a dict mapping each state to its block number.
+    """
+    # Inverse transitions restricted to the given states
+    inverse = [{} for _ in range(n_inputs)]
+    for state in states:
+        row = state * n_inputs
+        for i in range(n_inputs):
+            inverse[i].setdefault(next_state[row + i], []).append(state)
+
+    # Initial partition by observable output
+    groups = {}
+    for state in states:
+        groups.setdefault(signature(state), set()).add(state)
+    blocks = list(groups.values())
+    block_of = {}
+    for b, members in enumerate(blocks):
+        for state in members:
+            block_of[state] = b
+
+    pending = set(range(len(blocks)))
+    worklist = list(pending)
+
+    while worklist:
+        splitter = worklist.pop()
+        pending.discard(splitter)
+        targets = list(blocks[splitter])
+
+        for i in range(n_inputs):
+            # States that move into the splitter on input i, grouped by block
+            hit = {}
+            for target in targets:
+                for source in inverse[i].get(target, ()):
+                    hit.setdefault(block_of[source], set()).add(source)
+
+            for b, inside in hit.items():
+                members = blocks[b]
+                if len(inside) == len(members):
+                    continue
+
+                # Split block b into inside and the remainder
+                members -= inside
+                new = len(blocks)
+                blocks.append(inside)
+                for state in inside:
+                    block_of[state] = new
+
+                if b in pending:
+                    pending.add(new)
+                    worklist.append(new)
+                else:
+                    smaller = new if len(inside) <= len(members) else b
+                    pending.add(smaller)
+                    worklist.append(smaller)
+
+    return block_of
+
+
+def outcome_signature(machine, state):
+    """Default observation: every input's outcome code, with the cap ignored."""
+    row = state * machine.n_inputs
+    return tuple(INSERTED if status == CREDIT_LIMIT else status
+                 for status in machine.status[row:row + machine.n_inputs])
+
+
+def strict_signature(machine, state):
+    """The outcome code of every input, including refusals at the credit cap."""
+    row = state * machine.n_inputs
+    return tuple(machine.status[row:row + machine.n_inputs])
+
+
+class MinimizedMachine(CompiledMachine):
+    """Quotient of a CompiledMachine, usable anywhere the compiled one is."""
+
+    def __init__(self, machine, signature=None):
+        self.source = machine
+        self.denominations = machine.denominations
+        self.drink_price = machine.drink_price
+        self.keep_change = machine.keep_change
+        self.step_size = machine.step_size
+        self.max_credit = machine.max_credit
+        self.alphabet = machine.alphabet
+        self.n_inputs = machine.n_inputs
+        self.dispense_index = machine.dispense_index
+        self.cancel_index = machine.cancel_index
+        self.symbol_index = machine.symbol_index
+
+        n_inputs = machine.n_inputs
+        states = reachable_states(n_inputs, machine.next_state)
+
+        if signature is None:
+            signature = outcome_signature
+
+        block_of = hopcroft(states, n_inputs, machine.next_state,
+                            lambda state: signature(machine, state))
+
+        # Renumber blocks in BFS order so the start block is state 0
+        renumber = {}
+        self.members = []
+        for state in states:
+            b = block_of[state]
+            if b not in renumber:
+                renumber[b] = len(renumber)
+                self.members.append([])
+            self.members[renumber[b]].append(state)
+
+        self.block_of = {state: renumber[b] for state, b in block_of.items()}
+        self.n_states = len(self.members)
+        self.build_tables()
+        self.reset()
+
+    def build_tables(self):
+        """Project the source tables onto one representative per block."""
+        source = self.source
+        n_inputs = self.n_inputs
+        size = self.n_states * n_inputs
+        self.next_state = array("i", [0]) * size
+        self.status = array("b", [0]) * size
+        self.dispensed = array("b", [0]) * size
+
+        for block, members in enumerate(self.members):
+            old_row = members[0] * n_inputs
+            row = block * n_inputs
+            for i in range(n_inputs):
+                self.next_state[row + i] = self.block_of[source.next_state[old_row + i]]
+                self.status[row + i] = source.status[old_row + i]
+                self.dispensed[row + i] = source.dispensed[old_row + i]
+
+    def amount(self, state=None):
+        """Smallest credit in KShs represented by a block."""
+        if state is None:
+            state = self.state
+        return self.members[state][0] * self.step_size
+
+    def state_name(self, state=None):
+        if state is None:
+            state = self.state
+        members = self.members[state]
+        if len(members) == 1:
+            return f"q{members[0] * self.step_size}"
+
+        # Runs of consecutive credits as qA..qB, so a merged block stays readable
+        runs = []
+        for m in sorted(members):
+            if runs and runs[-1][1] == m - 1:
+                runs[-1][1] = m
+            else:
+                runs.append([m, m])
+        step = self.step_size
+        return "{" + ",".join(f"q{a * step}" if a == b else f"q{a * step}..q{b * step}"
+                              for a, b in runs) + "}"
+
+    def draw_simple_diagram(self):
+        """List every block with its outgoing transitions as plain text."""
+        lines = [f"Minimized State Diagram ({self.n_states} of "
+                 f"{self.source.n_states} states):"]
+        for block in range(self.n_states):
+            row = block * self.n_inputs
+            moves = ", ".join(
+                f"{symbol}->{self.state_name(self.next_state[row + i])}"
+                for i, symbol in enumerate(self.alphabet))
+            marker = "*" if block == self.state else " "
+            lines.append(f"{marker} {self.state_name(block)}: {moves}")
+        return "\n".join(lines)
+
+
+def minimize(machine, signature=None):
+    """Minimize a CompiledMachine under the given observation."""
+    return MinimizedMachine(machine, signature)
+
+
+def minimize_spec(denominations, drink_price, max_credit=DEFAULT_MAX_CREDIT, signature=None):
+    """Build the explicit automaton for a machine spec and minimize it."""
+    return MinimizedMachine(CompiledMachine(denominations, drink_price, max_credit), signature)
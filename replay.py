@@ -0,0 +1,116 @@
+"""Stream recorded insert/dispense/cancel events through the simulator.
+
+Event files are read lazily, one line at a time, so memory use does not depend
+on the size of the log. Two formats are accepted:
+
+    CSV   -- event,amount          e.g. "insert,50" or "dispense"
+    JSONL -- {"event": "insert", "amount": 50}
+"""
+import csv
+import json
+
+from dfa import VendingMachineSimulation
+
+
+def read_csv_events(lines):
+    """Yield (event, amount) pairs from CSV lines, skipping an optional header."""
+    for row in csv.reader(lines):
+        if not row or row[0].startswith("#") or row[0].strip().lower() == "event":
+            continue
+        event = row[0].strip().lower()
+        amount = row[1].strip() if len(row) > 1 else ""
+        yield event, amount
+
+
+def read_jsonl_events(lines):
+    """Yield (event, amount) pairs from JSON lines."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield "invalid", line
+            continue
+        if not isinstance(record, dict):
+            # Valid JSON, but not an event object
+            yield "invalid", line
+            continue
+        yield str(record.get("event", "")).lower(), record.get("amount", "")
+
+
+def read_events(path):
+    """Open an event log and yield (event, amount) pairs from it."""
+    reader = read_jsonl_events if path.endswith((".jsonl", ".json")) else read_csv_events
+    with open(path, newline="") as f:
+        yield from reader(f)
+
+
+def replay(events, vm=None):
+    """Drive a VendingMachineSimulation with events and return aggregate results."""
+    if vm is None:
+        vm = VendingMachineSimulation()
+
+    stats = {
+        "events": 0,
+        "inserts": 0,
+        "inserted_total": 0,
+        "rejected": 0,
+        "drinks_dispensed": 0,
+        "failed_dispenses": 0,
+        "cancellations": 0,
+        "refunded_total": 0,
+        "invalid": 0,
+    }
+    valid = vm.valid_denominations
+
+    for event, amount in events:
+        stats["events"] += 1
+
+        if event == "insert":
+            try:
+                amount = int(amount)
+            except (TypeError, ValueError):
+                stats["invalid"] += 1
+                continue
+            if amount not in valid:
+                stats["rejected"] += 1
+                continue
+            vm.insert_money(amount)
+            stats["inserts"] += 1
+            stats["inserted_total"] += amount
+
+        elif event == "dispense":
+            before = vm.drinks_dispensed
+            vm.dispense_drink()
+            if vm.drinks_dispensed == before:
+                stats["failed_dispenses"] += 1
+            else:
+                stats["drinks_dispensed"] += 1
+
+        elif event == "cancel":
+            refund = vm.current_amount
+            vm.cancel_transaction()
+            if refund:
+                stats["cancellations"] += 1
+                stats["refunded_total"] += refund
+
+        else:
+            stats["invalid"] += 1
+
+    stats["final_amount"] = vm.current_amount
+    stats["final_state"] = vm.current_state
+    return stats
+
+
+def replay_file(path, vm=None):
+    """Replay a CSV or JSONL event log and return aggregate results."""
+    return replay(read_events(path), vm)
+
+
+def format_report(stats):
+    """Render replay results as a short text report."""
+    width = max(len(key) for key in stats)
+    return "\n".join(f"{key.replace('_', ' ').title():<{width}} : {value}"
+                     for key, value in stats.items())
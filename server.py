@@ -0,0 +1,86 @@
+"""Line-based TCP server hosting one simulated vending machine per connection.
+
+The wire protocol is the command grammar of dfa.run_simulation: each request
+is one line (insert X, dispense, cancel, state, history, diagram, exit) and
+each response is the command's output followed by a line holding a single
+".". Clients may pipeline several commands without waiting for replies;
+responses come back in order. Writes are flow-controlled with drain(), so a
+client that stops reading stops being served instead of growing buffers.
+"""
+import asyncio
+
+from dfa import VendingMachineSimulation, handle_command
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8750
+MAX_LINE = 1024
+TERMINATOR = b"\n.\n"
+
+
+class VendingMachineServer:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT,
+                 machine_factory=VendingMachineSimulation):
+        self.host = host
+        self.port = port
+        self.machine_factory = machine_factory
+        self.sessions = 0
+        self.active = 0
+        self.server = None
+
+    async def handle_client(self, reader, writer):
+        """Serve one connection with its own machine session."""
+        vm = self.machine_factory()
+        self.sessions += 1
+        self.active += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Line longer than the stream limit
+                    writer.write(b"Command too long" + TERMINATOR)
+                    break
+                if not line:
+                    break
+
+                output = handle_command(vm, line.decode("utf-8", errors="replace"))
+                if output is None:
+                    writer.write(b"Goodbye" + TERMINATOR)
+                    break
+
+                writer.write(output.encode() + TERMINATOR)
+                # Waits only while the transport buffer is above its high-water mark
+                await writer.drain()
+
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.active -= 1
+            writer.close()
+
+    async def start(self):
+        """Start listening and return the asyncio server."""
+        self.server = await asyncio.start_server(
+            self.handle_client, self.host, self.port, limit=MAX_LINE)
+        return self.server
+
+    async def serve_forever(self):
+        server = await self.start()
+        async with server:
+            await server.serve_forever()
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Run the server until interrupted."""
+    print(f"Vending machine server listening on {host}:{port}")
+    try:
+        asyncio.run(VendingMachineServer(host, port).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    import sys
+
+    serve(port=int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT)
@@ -0,0 +1,51 @@
+"""Interned integer ids for the credit states of the vending automaton.
+
+A state id is credit // step: a small int that can index arrays and is the
+same id CompiledMachine uses. Names such as "q50" are formatted on demand
+for display and kept in a bounded cache, so a request for a huge id costs
+one string, not a name for every id below it. Machines with the same
+step share one StateTable, so diagrams, instrumentation and the compiled
+tables all agree on what an id means.
+"""
+from functools import reduce
+from math import gcd
+
+# Step of the dfa.py/main.py machines: gcd of their denominations and price
+DEFAULT_STEP = 10
+
+# Most names kept per table; ids past this are formatted on every call
+NAME_CACHE_LIMIT = 4096
+
+
+class StateTable:
+    def __init__(self, step=DEFAULT_STEP):
+        self.step = step
+        self.names = {}
+
+    def id_of(self, amount):
+        return amount // self.step
+
+    def amount(self, state):
+        return state * self.step
+
+    def name(self, state):
+        name = self.names.get(state)
+        if name is None:
+            name = f"q{state * self.step}"
+            if len(self.names) < NAME_CACHE_LIMIT:
+                self.names[state] = name
+        return name
+
+
+tables = {}
+
+
+def table_for(denominations, price):
+    """The shared StateTable for a machine with these denominations and price."""
+    step = reduce(gcd, denominations, price)
+    if step not in tables:
+        tables[step] = StateTable(step)
+    return tables[step]
+
+
+CREDIT_STATES = table_for([10, 20, 40, 50, 100, 200, 500, 1000], 50)
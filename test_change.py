@@ -0,0 +1,24 @@
+from change import ChangePlanner
+
+DENOMINATIONS = [10, 20, 40, 50, 100, 200, 500, 1000]
+
+
+def test_amount_the_denominations_cannot_make():
+    planner = ChangePlanner([20, 50], {20: 5, 50: 5})
+    assert planner.plan(10) is None
+    assert planner.plan(30) is None
+    assert planner.plan(70) == {20: 1, 50: 1}
+
+
+def test_amount_past_max_amount():
+    planner = ChangePlanner(DENOMINATIONS, {1000: 3, 500: 1}, max_amount=200)
+    assert planner.plan(2500) == {1000: 2, 500: 1}
+    assert planner.plan(5000) is None
+    assert ChangePlanner([20, 50], {20: 100}, max_amount=100).plan(1010) is None
+
+
+def test_prefers_fewest_pieces_within_inventory():
+    planner = ChangePlanner(DENOMINATIONS, {10: 5, 20: 5, 40: 5, 50: 5})
+    assert planner.plan(80) == {40: 2}
+    planner.inventory[40] = 0
+    assert planner.plan(80) == {50: 1, 20: 1, 10: 1}
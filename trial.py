@@ -1,30 +1,42 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-import time
 import random
 
+from animation import FrameClock
+from change import ChangePlanner, format_plan
+from diagram import RetainedDiagram, STATE_STYLE
+from engine import (DrinkMachine, VendingError, OUT_OF_STOCK, STATES, FULL_STOCK,
+                    VALID_DENOMINATIONS, CASH_FLOAT)
+from historyview import HistoryView, HISTORY_CAPACITY
+from instrument import enable_from_env
+from journal import JournaledMachine
+
+# Frames between the start of consecutive cans in a multi-drink order
+CAN_STAGGER = 2
+
 class VendingMachineGUI:
-    def __init__(self, root):
+    def __init__(self, root, animate=True, journal_path=None, show_dialogs=True):
         self.root = root
         self.root.title("JKUAT Soft Drink Vending Machine")
         self.root.geometry("1000x700")
         self.root.configure(bg="#f0f0f0")
         
-        # Initialize the vending machine logic
-        self.current_amount = 0
-        self.drink_price = 50
-        self.valid_denominations = [10, 20, 40, 50, 100, 200, 500, 1000]
-        self.transaction_history = []
-        self.drinks_dispensed = 0
-        self.current_state = "q0"
-        
-        # Initialize stock
-        self.drink_types = ["Coca Cola", "Sprite", "Fanta", "Pepsi", "Mountain Dew", "7Up"]
+        # The headless engine owns credit, stock and selection; this class is the view
+        self.machine = DrinkMachine(history_capacity=HISTORY_CAPACITY,
+                                    change_planner=ChangePlanner(VALID_DENOMINATIONS, CASH_FLOAT))
+        if journal_path:
+            # Journal every change and recover the state left by the last run
+            self.machine = JournaledMachine(self.machine, journal_path)
+            if self.machine.is_busy():
+                # Power was lost mid-dispense; the sale itself was already committed
+                self.machine.complete_purchase()
         self.drink_colors = ["#e51c23", "#4caf50", "#ff9800", "#2196f3", "#8bc34a", "#00bcd4"]
-        self.stock = {drink: 5 for drink in self.drink_types}  # 5 of each drink
-        self.selected_drinks = []
         
-        # For animation
+        # For animation; animate=False commits purchases immediately
+        self.animate = animate
+        # show_dialogs=False keeps the purchase flow free of modal boxes (for tests)
+        self.show_dialogs = show_dialogs
+        self.frame_clock = FrameClock(self.root)
         self.animation_in_progress = False
         self.sound_enabled = True
         
@@ -45,8 +57,13 @@ class VendingMachineGUI:
         
         # Initial state visualization
         self.update_state_display()
+        self.draw_diagram()
         self.update_diagram()
     
+    @property
+    def current_state(self):
+        return self.machine.current_state
+    
     def create_frames(self):
         # Main container
         self.main_container = tk.Frame(self.root, bg="#f0f0f0")
@@ -120,7 +137,7 @@ class VendingMachineGUI:
         coin_frame.pack(fill=tk.X, pady=10, padx=20)
         
         # Create buttons for each denomination
-        for i, denom in enumerate(self.valid_denominations):
+        for i, denom in enumerate(self.machine.valid_denominations):
             row = i // 4
             col = i % 4
             
@@ -143,7 +160,7 @@ class VendingMachineGUI:
         self.drink_buttons = {}
         self.stock_labels = {}
         
-        for i, drink in enumerate(self.drink_types):
+        for i, drink in enumerate(self.machine.drink_types):
             row = i // 2
             col = i % 2
             
@@ -170,7 +187,7 @@ class VendingMachineGUI:
             drink_name.pack()
             
             # Stock label
-            stock_label = tk.Label(drink_item_frame, text=f"Stock: {self.stock[drink]}", 
+            stock_label = tk.Label(drink_item_frame, text=f"Stock: {self.machine.stock[drink]}", 
                                   font=("Arial", 9), bg="#ffffff")
             stock_label.pack()
             
@@ -251,6 +268,9 @@ class VendingMachineGUI:
         
         # Make the text widget read-only
         self.history_text.config(state=tk.DISABLED)
+        
+        # Bounded view of the machine's history that batches inserts and pages older entries in
+        self.history_view = HistoryView(self.history_text, scrollbar, self.machine.history)
     
     def create_diagram_view(self):
         diagram_frame = tk.LabelFrame(self.right_frame, text="State Diagram", 
@@ -263,16 +283,12 @@ class VendingMachineGUI:
     
     def insert_money(self, denomination):
         # Update state
-        old_state = self.current_state
-        self.current_amount += denomination
-        
-        if self.current_state == "q0":
-            self.current_state = "Waiting for Payment"
+        self.machine.insert_money(denomination)
         
         # Update UI
         self.update_state_display()
         self.update_diagram()
-        self.add_history(f"Inserted {denomination} KShs")
+        self.history_view.refresh()
         
         # Play coin sound
         if self.sound_enabled:
@@ -287,20 +303,13 @@ class VendingMachineGUI:
         self.update_dispense_button()
     
     def select_drink(self, drink):
-        # Check if drink is in stock
-        if self.stock[drink] <= 0:
-            messagebox.showinfo("Out of Stock", f"Sorry, {drink} is out of stock!")
-            return
-        
-        # Check if user has enough money
-        if self.current_amount < self.drink_price:
-            needed = self.drink_price - self.current_amount
-            messagebox.showinfo("Insufficient Funds", f"Please insert {needed} more KShs")
+        # Add drink to selection if it is in stock and affordable
+        try:
+            self.machine.select_drink(drink)
+        except VendingError as error:
+            self.notify(error.title, error.message)
             return
         
-        # Add drink to selection
-        self.selected_drinks.append(drink)
-        
         # Update display
         self.update_selection_display()
         self.status_label.config(text=f"Selected {drink}", fg="#008000")
@@ -313,128 +322,98 @@ class VendingMachineGUI:
         self.update_dispense_button()
     
     def update_selection_display(self):
-        if not self.selected_drinks:
+        drink_counts = self.machine.selection_counts()
+        if not drink_counts:
             self.selection_label.config(text="Selected: None")
         else:
-            # Count occurrences of each drink
-            drink_counts = {}
-            for drink in self.selected_drinks:
-                if drink in drink_counts:
-                    drink_counts[drink] += 1
-                else:
-                    drink_counts[drink] = 1
-            
             # Create display text
             selection_text = "Selected: " + ", ".join(f"{count}x {drink}" for drink, count in drink_counts.items())
             self.selection_label.config(text=selection_text)
     
     def dispense_drinks(self):
-        if not self.selected_drinks:
-            messagebox.showinfo("No Selection", "Please select a drink first!")
+        if self.animation_in_progress:
             return
         
-        # Calculate total cost
-        total_cost = len(self.selected_drinks) * self.drink_price
-        
-        # Check if user has enough money
-        if self.current_amount < total_cost:
-            needed = total_cost - self.current_amount
-            messagebox.showinfo("Insufficient Funds", f"Please insert {needed} more KShs")
+        # Commit the purchase in the engine; the animation below is only a view of it
+        try:
+            purchase = self.machine.begin_purchase()
+        except VendingError as error:
+            self.notify(error.title, error.message)
             return
         
-        # Update state
-        old_state = self.current_state
-        self.current_state = "Processing Purchase"
-        self.update_state_display()
         self.update_diagram()
         
         # Start dispensing process
-        self.animate_dispensing()
+        self.animate_dispensing(purchase)
     
-    def animate_dispensing(self):
-        if self.animation_in_progress:
-            return
-        
+    def animate_dispensing(self, purchase):
         self.animation_in_progress = True
-        self.current_state = "Dispensing Drink(s)"
         self.update_state_display()
         
-        # Clear previous dispense text
-        self.dispense_canvas.delete("dispense_text")
-        self.dispense_canvas.create_text(140, 30, text="Dispensing...", tags=("dispense_text"), font=("Arial", 10, "bold"))
-        
-        # Calculate cost and change
-        total_cost = len(self.selected_drinks) * self.drink_price
-        change = self.current_amount - total_cost
+        # Show the stock left after this purchase
+        for drink in set(purchase.drinks):
+            self.stock_labels[drink].config(text=f"Stock: {self.machine.stock[drink]}")
+            
+            # Update buttons if stock depleted
+            if self.machine.stock[drink] <= 0:
+                self.drink_buttons[drink].config(state=tk.DISABLED, bg="#a0a0a0")
         
-        # Process each selected drink
-        self.process_next_drink(0, change)
-    
-    def process_next_drink(self, index, change):
-        if index >= len(self.selected_drinks):
-            # All drinks dispensed
-            self.finish_dispensing(change)
+        # Fast mode commits the purchase without any animation
+        if not self.animate:
+            self.finish_dispensing(purchase)
             return
         
-        drink = self.selected_drinks[index]
+        # Clear previous dispense text
+        self.dispense_canvas.delete("dispense_text")
+        self.dispense_canvas.create_text(140, 30, text="Dispensing...", tags=("dispense_text"), font=("Arial", 10, "bold"))
         
-        # Update stock
-        self.stock[drink] -= 1
-        self.stock_labels[drink].config(text=f"Stock: {self.stock[drink]}")
+        # All cans fall concurrently on the shared frame clock, slightly staggered
+        remaining = [len(purchase.drinks)]
         
-        # Update buttons if stock depleted
-        if self.stock[drink] <= 0:
-            self.drink_buttons[drink].config(state=tk.DISABLED, bg="#a0a0a0")
+        def can_landed():
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                self.finish_dispensing(purchase)
         
-        # Animate can dropping
-        self.animate_can_drop(drink, index, change)
+        for index, drink in enumerate(purchase.drinks):
+            self.frame_clock.add(self.can_drop_frames(drink, index), can_landed)
     
-    def animate_can_drop(self, drink, index, change):
+    def can_drop_frames(self, drink, index):
+        """Frames of one can falling into the tray; starts index * CAN_STAGGER ticks late."""
+        for _ in range(index * CAN_STAGGER):
+            yield
+        
         # Get color for this drink
-        color = self.drink_colors[self.drink_types.index(drink)]
+        color = self.drink_colors[self.machine.drink_types.index(drink)]
         
-        # Create can at top
-        can_id = self.dispense_canvas.create_oval(120, 10, 160, 30, fill=color, outline="")
-        rect_id = self.dispense_canvas.create_rectangle(120, 20, 160, 40, fill=color, outline="")
-        bottom_id = self.dispense_canvas.create_oval(120, 30, 160, 50, fill=color, outline="")
+        # Create can at top, spreading cans across the tray
+        x = 20 + (index % 6) * 40
+        can_id = self.dispense_canvas.create_oval(x, 10, x + 40, 30, fill=color, outline="")
+        rect_id = self.dispense_canvas.create_rectangle(x, 20, x + 40, 40, fill=color, outline="")
+        bottom_id = self.dispense_canvas.create_oval(x, 30, x + 40, 50, fill=color, outline="")
         
         # Play dispensing sound
         if self.sound_enabled:
             self.play_sound("dispense")
         
-        # Animate dropping
-        self.animate_drop(can_id, rect_id, bottom_id, 0, drink, index, change)
-    
-    def animate_drop(self, can_id, rect_id, bottom_id, step, drink, index, change):
-        if step < 6:  # Number of animation steps
+        for step in range(6):  # Number of animation steps
             # Move can down
             self.dispense_canvas.move(can_id, 0, 10)
             self.dispense_canvas.move(rect_id, 0, 10)
             self.dispense_canvas.move(bottom_id, 0, 10)
-            
-            # Schedule next frame
-            self.root.after(100, lambda: self.animate_drop(
-                can_id, rect_id, bottom_id, step + 1, drink, index, change))
-        else:
-            # Animation complete for this can
-            # Process next drink after a delay
-            self.root.after(500, lambda: self.process_next_drink(index + 1, change))
+            yield
     
-    def finish_dispensing(self, change):
-        # Update state and UI
-        self.drinks_dispensed += len(self.selected_drinks)
-        
-        # Calculate cost
-        total_cost = len(self.selected_drinks) * self.drink_price
+    def finish_dispensing(self, purchase):
+        change = purchase.change
+        dispensed_drinks = purchase.drinks
         
         # Update amount and state
-        self.current_amount = change
-        self.current_state = "Idle" if change == 0 else "Waiting for Payment"
+        self.machine.complete_purchase()
         
         # Update display
         self.dispense_canvas.delete("dispense_text")
         self.dispense_canvas.create_text(140, 30, 
-                                       text=f"{len(self.selected_drinks)} drink(s) dispensed!",
+                                       text=f"{len(dispensed_drinks)} drink(s) dispensed!",
                                        tags=("dispense_text"), font=("Arial", 10))
         
         if change > 0:
@@ -446,22 +425,17 @@ class VendingMachineGUI:
         if change > 0 and self.sound_enabled:
             self.play_sound("change")
         
-        # Log transaction
-        dispensed_summary = ", ".join(sorted(self.selected_drinks))
-        self.add_history(f"Dispensed: {dispensed_summary}. Total: {total_cost} KShs.")
-        if change > 0:
-            self.add_history(f"Change returned: {change} KShs")
+        # Show the purchase the engine logged
+        self.history_view.refresh()
         
         # Clear selection
-        dispensed_drinks = self.selected_drinks.copy()
-        self.selected_drinks = []
         self.update_selection_display()
         
         # Show message box
         message = f"Thank you for your purchase!\n\nDrinks dispensed: {len(dispensed_drinks)}\n"
         if change > 0:
             message += f"Change: {change} KShs"
-        messagebox.showinfo("Purchase Complete", message)
+        self.notify("Purchase Complete", message)
         
         # Update state display and diagram
         self.update_state_display()
@@ -474,14 +448,15 @@ class VendingMachineGUI:
         # Check if any drinks are out of stock
         self.check_stock_status()
     
+    def notify(self, title, message, show=messagebox.showinfo):
+        if self.show_dialogs:
+            show(title, message)
+    
     def check_stock_status(self):
-        out_of_stock = [drink for drink, count in self.stock.items() if count <= 0]
-        
-        if len(out_of_stock) == len(self.drink_types):
+        if self.machine.check_stock_status():
             # All drinks out of stock
-            self.current_state = "Out of Stock"
             self.status_label.config(text="ALL DRINKS OUT OF STOCK", fg="#ff0000")
-            messagebox.showwarning("Out of Stock", "All drinks are out of stock!")
+            self.notify("Out of Stock", "All drinks are out of stock!", messagebox.showwarning)
             self.update_state_display()
             self.update_diagram()
     
@@ -489,25 +464,19 @@ class VendingMachineGUI:
         if self.animation_in_progress:
             return
         
-        if self.current_amount == 0 and not self.selected_drinks:
-            self.status_label.config(text="No money to return", fg="#ff0000")
+        try:
+            refund = self.machine.cancel_transaction()
+        except VendingError as error:
+            self.status_label.config(text=error.message, fg="#ff0000")
             return
         
-        # Get refund amount
-        refund = self.current_amount
-        old_state = self.current_state
-        
-        # Update state
-        self.current_amount = 0
-        self.current_state = "Idle"
-        
         # Clear selection
-        self.selected_drinks = []
         self.update_selection_display()
         
         # Update UI
-        self.status_label.config(text=f"Returned {refund} KShs", fg="#ff0000")
-        self.add_history(f"Transaction cancelled. Refunded {refund} KShs")
+        self.status_label.config(text=f"Returned {refund} KShs "
+                                      f"({format_plan(self.machine.last_payout)})", fg="#ff0000")
+        self.history_view.refresh()
         
         # Play refund sound
         if self.sound_enabled and refund > 0:
@@ -515,7 +484,7 @@ class VendingMachineGUI:
         
         # Show message
         if refund > 0:
-            messagebox.showinfo("Transaction Cancelled", f"Refunded {refund} KShs")
+            self.notify("Transaction Cancelled", f"Refunded {refund} KShs")
         
         # Update display and diagram
         self.update_state_display()
@@ -526,41 +495,32 @@ class VendingMachineGUI:
     
     def update_state_display(self):
         # Update labels
-        self.state_label.config(text=f"Current State: {self.current_state}")
-        self.amount_label.config(text=f"Amount: {self.current_amount} KShs")
+        self.state_label.config(text=f"Current State: {self.machine.current_state}")
+        self.amount_label.config(text=f"Amount: {self.machine.current_amount} KShs")
         
         # Update button states
         self.update_drink_buttons()
         self.update_dispense_button()
     
     def update_drink_buttons(self):
-        for drink in self.drink_types:
+        for drink in self.machine.drink_types:
             # Enable/disable based on stock and funds
-            if self.stock[drink] <= 0:
-                self.drink_buttons[drink].config(state=tk.DISABLED, bg="#a0a0a0")
-            elif self.current_amount >= self.drink_price:
+            if self.machine.can_select(drink):
                 self.drink_buttons[drink].config(state=tk.NORMAL, bg="#4CAF50")
             else:
                 self.drink_buttons[drink].config(state=tk.DISABLED, bg="#a0a0a0")
     
     def update_dispense_button(self):
-        # Enable dispense button if selected drinks and enough money
-        if self.selected_drinks and self.current_amount >= len(self.selected_drinks) * self.drink_price:
-            self.dispense_button.config(state=tk.NORMAL, bg="#4CAF50")
-        elif self.current_amount >= self.drink_price:
-            # Enable dispense button if we have enough money for at least one drink
-            # This allows direct dispensing when money is inserted
+        # Enable dispense button if the selection (or at least one drink) is paid for
+        if self.machine.can_dispense():
             self.dispense_button.config(state=tk.NORMAL, bg="#4CAF50")
         else:
             self.dispense_button.config(state=tk.DISABLED, bg="#a0a0a0")
     
-    def update_diagram(self):
-        # Clear canvas
+    def draw_diagram(self):
+        """Draw the static state diagram once and keep its canvas item ids."""
         self.canvas.delete("all")
-        
-        # Define states to show
-        states = ["Idle", "Waiting for Payment", "Processing Purchase", 
-                 "Dispensing Drink(s)", "Out of Stock"]
+        self.diagram = RetainedDiagram(self.canvas)
         
         # Define state positions
         positions = {
@@ -573,16 +533,11 @@ class VendingMachineGUI:
         
         # Draw states
         radius = 40
-        for state in states:
+        for state in STATES:
             x, y = positions[state]
             
-            # Highlight current state
-            fill_color = "#ffcc00" if state == self.current_state else "white"
-            outline_color = "red" if state == self.current_state else "black"
-            outline_width = 3 if state == self.current_state else 1
-            
-            self.canvas.create_oval(x-radius, y-radius, x+radius, y+radius, 
-                                   fill=fill_color, outline=outline_color, width=outline_width)
+            oval = self.canvas.create_oval(x-radius, y-radius, x+radius, y+radius, **STATE_STYLE)
+            self.diagram.add_state(state, oval)
             
             # Wrap text if needed
             if len(state) > 10:
@@ -609,6 +564,10 @@ class VendingMachineGUI:
         self.draw_transition("Waiting for Payment", "Out of Stock", "All Drinks Sold", positions)
         self.draw_transition("Out of Stock", "Idle", "Refill", positions)
     
+    def update_diagram(self):
+        # Only the previous/current state and the active transition are restyled
+        self.diagram.set_current(self.machine.current_state)
+    
     def draw_transition(self, from_state, to_state, label, positions):
         x1, y1 = positions[from_state]
         x2, y2 = positions[to_state]
@@ -620,22 +579,22 @@ class VendingMachineGUI:
             cy = (y1 + y2) / 2
             
             # Draw a curved line
-            self.canvas.create_line(x1+40, y1, cx, cy, x2+40, y2, 
+            line = self.canvas.create_line(x1+40, y1, cx, cy, x2+40, y2, 
                                    smooth=True, arrow=tk.LAST, width=1.5)
             
             # Position label
             self.canvas.create_text(cx+20, cy-10, text=label, anchor=tk.W)
         elif from_state == "Idle" and to_state == "Waiting for Payment":
             # Vertical line
-            self.canvas.create_line(x1, y1+40, x2, y2-40, arrow=tk.LAST, width=1.5)
+            line = self.canvas.create_line(x1, y1+40, x2, y2-40, arrow=tk.LAST, width=1.5)
             self.canvas.create_text((x1+x2)/2 + 40, (y1+y2)/2, text=label, anchor=tk.W)
         elif from_state == "Waiting for Payment" and to_state == "Idle":
             # Return line
-            self.canvas.create_line(x1-30, y1-30, x2-30, y2+30, arrow=tk.LAST, width=1.5)
+            line = self.canvas.create_line(x1-30, y1-30, x2-30, y2+30, arrow=tk.LAST, width=1.5)
             self.canvas.create_text((x1+x2)/2 - 60, (y1+y2)/2, text=label, anchor=tk.E)
         else:
             # Draw a direct line
-            self.canvas.create_line(x1+40*((x2-x1)/((x2-x1)**2+(y2-y1)**2)**0.5), 
+            line = self.canvas.create_line(x1+40*((x2-x1)/((x2-x1)**2+(y2-y1)**2)**0.5), 
                                   y1+40*((y2-y1)/((x2-x1)**2+(y2-y1)**2)**0.5),
                                   x2-40*((x2-x1)/((x2-x1)**2+(y2-y1)**2)**0.5), 
                                   y2-40*((y2-y1)/((x2-x1)**2+(y2-y1)**2)**0.5),
@@ -646,23 +605,8 @@ class VendingMachineGUI:
             mid_y = (y1 + y2) / 2
             offset = 15  # Offset to avoid overlapping with the line
             self.canvas.create_text(mid_x, mid_y - offset, text=label)
-    
-    def add_history(self, message):
-        timestamp = time.strftime("%H:%M:%S")
-        entry = f"[{timestamp}] {message}\n"
-        
-        # Enable text widget for editing
-        self.history_text.config(state=tk.NORMAL)
         
-        # Insert at the beginning
-        # Enable text widget for editing
-        self.history_text.config(state=tk.NORMAL)
-        
-        # Insert at the beginning
-        self.history_text.insert("1.0", entry)
-        
-        # Disable text widget again
-        self.history_text.config(state=tk.DISABLED)
+        self.diagram.add_transition(from_state, to_state, line, width=1.5)
     
     def play_sound(self, sound_type):
         """Simulate playing a sound effect"""
@@ -725,7 +669,7 @@ class VendingMachineGUI:
         # Create a grid of stock controls
         stock_controls = {}
         row = 0
-        for drink in self.drink_types:
+        for drink in self.machine.drink_types:
             # Drink name
             tk.Label(stock_frame, text=drink, font=("Arial", 12), bg="#f0f0f0").grid(
                 row=row, column=0, sticky=tk.W, pady=5)
@@ -734,7 +678,7 @@ class VendingMachineGUI:
             tk.Label(stock_frame, text="Current Stock:", bg="#f0f0f0").grid(
                 row=row, column=1, padx=10)
             
-            stock_var = tk.StringVar(value=str(self.stock[drink]))
+            stock_var = tk.StringVar(value=str(self.machine.stock[drink]))
             stock_entry = tk.Entry(stock_frame, textvariable=stock_var, width=5)
             stock_entry.grid(row=row, column=2)
             
@@ -769,11 +713,9 @@ class VendingMachineGUI:
         tk.Label(report_frame, text="Sales Statistics", 
                 font=("Arial", 14, "bold"), bg="#f0f0f0").pack(anchor=tk.W)
         
-        tk.Label(report_frame, text=f"Total Drinks Dispensed: {self.drinks_dispensed}", 
-                font=("Arial", 12), bg="#f0f0f0", pady=5).pack(anchor=tk.W)
-        
-        tk.Label(report_frame, text=f"Total Revenue: {self.drinks_dispensed * self.drink_price} KShs", 
-                font=("Arial", 12), bg="#f0f0f0", pady=5).pack(anchor=tk.W)
+        # Read straight from the running aggregates kept by the engine
+        tk.Label(report_frame, text=self.machine.analytics.format_report(),
+                font=("Courier", 11), bg="#f0f0f0", justify=tk.LEFT, pady=5).pack(anchor=tk.W)
         
         # Transaction log
         tk.Label(report_frame, text="Transaction Log", 
@@ -789,8 +731,8 @@ class VendingMachineGUI:
         log_text.pack(fill=tk.BOTH, expand=True)
         scrollbar.config(command=log_text.yview)
         
-        # Copy transaction history
-        log_text.insert(tk.END, self.history_text.get("1.0", tk.END))
+        # Copy transaction history from the machine, newest first
+        log_text.insert(tk.END, "".join(self.history_view.entries()))
         log_text.config(state=tk.DISABLED)
         
         # Maintenance tab
@@ -804,8 +746,8 @@ class VendingMachineGUI:
         tk.Label(maint_frame, text="Maintenance Controls", 
                 font=("Arial", 14, "bold"), bg="#f0f0f0").pack(anchor=tk.W, pady=10)
         
-        # Reset counter button
-        tk.Button(maint_frame, text="Reset Transaction Counter",
+        # Reset sales statistics button
+        tk.Button(maint_frame, text="Reset Sales Statistics",
                  command=self.reset_transaction_counter,
                  bg="#e0e0e0", pady=5).pack(anchor=tk.W, pady=5, fill=tk.X)
         
@@ -830,14 +772,14 @@ class VendingMachineGUI:
     def adjust_stock(self, drink, stock_var, amount):
         """Adjust stock level of a drink"""
         current = int(stock_var.get())
-        new_value = max(0, min(current + amount, 10))  # Limit between 0 and 10
+        was_out_of_stock = self.machine.current_state == OUT_OF_STOCK
+        
+        # Update actual stock (limited between 0 and 10)
+        new_value = self.machine.set_stock(drink, current + amount)
         
         # Update stock variable
         stock_var.set(str(new_value))
         
-        # Update actual stock
-        self.stock[drink] = new_value
-        
         # Update stock display
         self.stock_labels[drink].config(text=f"Stock: {new_value}")
         
@@ -845,49 +787,45 @@ class VendingMachineGUI:
         self.update_drink_buttons()
         
         # Check if we're no longer out of stock
-        if self.current_state == "Out of Stock" and any(count > 0 for count in self.stock.values()):
-            self.current_state = "Idle"
+        if was_out_of_stock and self.machine.current_state != OUT_OF_STOCK:
             self.status_label.config(text="Ready", fg="#008000")
             self.update_state_display()
             self.update_diagram()
     
     def refill_all_stock(self, stock_controls):
         """Refill all drinks to maximum stock level"""
+        was_out_of_stock = self.machine.current_state == OUT_OF_STOCK
+        self.machine.refill_all(FULL_STOCK)
+        
         for drink, stock_var in stock_controls.items():
             # Set to maximum (5)
-            stock_var.set("5")
-            self.stock[drink] = 5
+            stock_var.set(str(FULL_STOCK))
             
             # Update stock display
-            self.stock_labels[drink].config(text="Stock: 5")
+            self.stock_labels[drink].config(text=f"Stock: {FULL_STOCK}")
         
-        # Log the refill
-        self.add_history("Admin: Refilled all drinks to maximum stock")
+        # Show the refill the engine logged
+        self.history_view.refresh()
         
         # Update button states
         self.update_drink_buttons()
         
         # If we were out of stock, update state
-        if self.current_state == "Out of Stock":
-            self.current_state = "Idle"
+        if was_out_of_stock:
             self.status_label.config(text="Ready", fg="#008000")
             self.update_state_display()
             self.update_diagram()
     
     def reset_transaction_counter(self):
-        """Reset the transaction counter"""
-        self.drinks_dispensed = 0
-        messagebox.showinfo("Counter Reset", "Transaction counter has been reset to zero.")
+        """Reset the sales statistics shown in the Sales Report tab"""
+        self.machine.reset_counter()
+        messagebox.showinfo("Statistics Reset", "Sales statistics have been reset to zero.")
     
     def clear_transaction_history(self):
         """Clear the transaction history"""
-        # Clear text widget
-        self.history_text.config(state=tk.NORMAL)
-        self.history_text.delete("1.0", tk.END)
-        self.history_text.config(state=tk.DISABLED)
-        
-        # Clear history list
-        self.transaction_history = []
+        # Clear history list, then the widget showing it
+        self.machine.clear_history()
+        self.history_view.clear()
         
         messagebox.showinfo("History Cleared", "Transaction history has been cleared.")
     
@@ -927,10 +865,13 @@ class VendingMachineGUI:
         messagebox.showinfo("Success", "Admin password has been changed successfully")
 
 
-def main():
+def main(journal_path=None):
+    enable_from_env(VendingMachineGUI, DrinkMachine)
     root = tk.Tk()
-    app = VendingMachineGUI(root)
+    app = VendingMachineGUI(root, journal_path=journal_path)
     root.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import sys
+    
+    main(sys.argv[2] if len(sys.argv) == 3 and sys.argv[1] == "--journal" else None)
\ No newline at end of file